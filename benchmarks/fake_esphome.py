@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+"""Substituto do executável do esphome usado pelos benchmarks.
+
+`compile` imprime FAKE_LINES linhas (simulando a saída do PlatformIO) ao longo de
+FAKE_SECONDS segundos e grava o firmware.bin no diretório de build do dispositivo.
+`upload` lê o firmware informado em --file; se --device for host:porta, envia o
+firmware por TCP (veja ota_listener.py) e falha se a conexão for recusada ou
+derrubada sem resposta.
+"""
+import os
+import socket
+import sys
+import time
+
+
+def ota_upload(target, firmware):
+    host, port = target.rsplit(":", 1)
+    print(f"INFO Connecting to {host} port {port}...", flush=True)
+    try:
+        # sem timeout: quem desiste de um dispositivo travado é o OTA_TIMEOUT do job
+        with socket.create_connection((host, int(port))) as connection:
+            connection.sendall(firmware)
+            connection.shutdown(socket.SHUT_WR)
+            reply = connection.recv(64)
+    except OSError as error:
+        print(f"ERROR Connecting to {host} port {port} failed: {error}", flush=True)
+        return 1
+    if not reply.startswith(b"OK"):
+        print("ERROR Error receiving acknowledge binary data", flush=True)
+        return 1
+    print("INFO OTA successful", flush=True)
+    return 0
+
+
+def main(args):
+    lines = int(os.environ.get("FAKE_LINES", 2000))
+    seconds = float(os.environ.get("FAKE_SECONDS", 2))
+    command, config_file = args[0], args[1]
+    name = os.path.splitext(os.path.basename(config_file))[0]
+    print(f"INFO Reading configuration {config_file}...", flush=True)
+    chunk = max(1, lines // 50)
+    for index in range(lines):
+        print(f"Compiling .pioenvs/{name}/src/file_{index}.cpp.o", flush=index % chunk == 0)
+        if index % chunk == 0:
+            time.sleep(seconds / 50)
+    sys.stdout.flush()
+    if command == "compile":
+        build_dir = os.path.join(
+            os.path.dirname(config_file), ".esphome", "build", name, ".pioenvs", name
+        )
+        os.makedirs(build_dir, exist_ok=True)
+        with open(os.path.join(build_dir, "firmware.bin"), "wb") as firmware:
+            firmware.write(os.urandom(64 * 1024))
+    elif command == "upload":
+        with open(args[args.index("--file") + 1], "rb") as firmware:
+            data = firmware.read()
+        target = args[args.index("--device") + 1]
+        if ":" in target and not target.startswith("/"):
+            return ota_upload(target, data)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,163 @@
+"""Teste de carga do executor de jobs.
+
+Sobe o servidor real (eventlet) com um banco SQLite temporário e um esphome falso,
+mede a latência de uma requisição HTTP leve com o servidor ocioso e enquanto
+N compilações rodam em paralelo imprimindo saída, e imprime o resultado em JSON.
+
+    python benchmarks/job_load.py --builds 8 --lines 5000
+"""
+import argparse
+import json
+import math
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.parse
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FAKE_ESPHOME = os.path.join(ROOT, "benchmarks", "fake_esphome.py")
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def request(base_url, path, data=None, json_body=None):
+    headers = {}
+    body = None
+    if json_body is not None:
+        body = json.dumps(json_body).encode()
+        headers["Content-Type"] = "application/json"
+    elif data is not None:
+        body = urllib.parse.urlencode(data).encode()
+    req = urllib.request.Request(base_url + path, data=body, headers=headers)
+    with urllib.request.urlopen(req, timeout=60) as response:
+        content = response.read()
+    if response.headers.get_content_type() == "application/json":
+        return json.loads(content)
+    return content
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    if not samples:
+        return {"count": 0}
+    return {
+        "count": len(samples),
+        "p50_ms": round(statistics.median(samples) * 1000, 2),
+        # nearest rank: o menor valor que cobre 95% das amostras
+        "p95_ms": round(samples[max(0, math.ceil(0.95 * len(samples)) - 1)] * 1000, 2),
+        "max_ms": round(samples[-1] * 1000, 2),
+    }
+
+
+def measure(base_url, path, until, interval):
+    samples = []
+    while not until():
+        start = time.perf_counter()
+        request(base_url, path)
+        samples.append(time.perf_counter() - start)
+        time.sleep(interval)
+    return samples
+
+
+def start_server(workdir, env):
+    subprocess.run(
+        [sys.executable, "-m", "flask", "--app", "src.main", "db", "upgrade"],
+        cwd=workdir, env=env, check=True, capture_output=True,
+    )
+    server = subprocess.Popen(
+        [sys.executable, "-m", "src.main"],
+        cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", int(env["PORT"])), timeout=0.5):
+                return server
+        except OSError:
+            time.sleep(0.1)
+    server.kill()
+    raise RuntimeError("o servidor não iniciou a tempo")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--builds", type=int, default=8, help="Compilações simultâneas.")
+    parser.add_argument("--lines", type=int, default=5000, help="Linhas de saída por compilação.")
+    parser.add_argument("--seconds", type=float, default=3, help="Duração de cada compilação.")
+    parser.add_argument("--idle", type=float, default=2, help="Segundos medindo com o servidor ocioso.")
+    parser.add_argument("--interval", type=float, default=0.02, help="Intervalo entre requisições.")
+    parser.add_argument("--path", default="/api/devices?limit=1", help="Rota medida.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        port = free_port()
+        env = {
+            **os.environ,
+            "PYTHONPATH": ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""),
+            "DATABASE_URL": "sqlite:///" + os.path.join(workdir, "benchmark.db"),
+            "ESPHOME_EXECUTABLE": FAKE_ESPHOME,
+            "LOG_DIR": os.path.join(workdir, "logs"),
+            "BUILD_WORKERS": str(args.builds),
+            "FAKE_LINES": str(args.lines),
+            "FAKE_SECONDS": str(args.seconds),
+            "PORT": str(port),
+        }
+        os.makedirs(os.path.join(workdir, "esphome_files"))
+        server = start_server(workdir, env)
+        base_url = f"http://127.0.0.1:{port}"
+        try:
+            for index in range(args.builds):
+                request(base_url, "/create-device", data={
+                    "deviceName": f"bench{index}",
+                    "platform": "esp32",
+                    "board": "esp32dev",
+                    "wifiSsid": "benchmark",
+                    "wifiPassword": "benchmark",
+                })
+            devices = request(base_url, f"/api/devices?limit={args.builds}&fields=id")["items"]
+
+            idle_end = time.monotonic() + args.idle
+            idle = measure(base_url, args.path, lambda: time.monotonic() >= idle_end, args.interval)
+
+            started = time.monotonic()
+            batch = request(base_url, "/api/builds", json_body={
+                "device_ids": [device["id"] for device in devices],
+            })
+            state = {"summary": batch, "checked": 0.0}
+
+            def finished():
+                # consulta o lote no máximo a cada 0,25s para não dominar a medição
+                if time.monotonic() - state["checked"] >= 0.25:
+                    state["summary"] = request(base_url, f"/api/builds/{batch['batch_id']}")
+                    state["checked"] = time.monotonic()
+                return state["summary"]["finished"] == state["summary"]["total"]
+
+            loaded = measure(base_url, args.path, finished, args.interval)
+            wall_time = time.monotonic() - started
+        finally:
+            server.terminate()
+            server.wait(timeout=10)
+
+    print(json.dumps({
+        "builds": args.builds,
+        "lines_per_build": args.lines,
+        "seconds_per_build": args.seconds,
+        "path": args.path,
+        "idle": percentiles(idle),
+        "loaded": percentiles(loaded),
+        "batch_wall_time": round(wall_time, 3),
+        "succeeded": state["summary"]["succeeded"],
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Dispositivo OTA falso para testar os jobs de OTA sem hardware.
+
+Escuta em uma porta TCP e recebe o firmware enviado pelo `upload` do
+fake_esphome.py (com `--device host:porta`). Comportamentos:
+
+- ok: lê o firmware até o fim e responde "OK <bytes>";
+- hang: aceita a conexão e nunca responde (o job deve estourar o OTA_TIMEOUT);
+- flaky: derruba as primeiras --drop conexões sem responder e depois se comporta como ok.
+
+    python benchmarks/ota_listener.py --port 3232 --mode flaky --drop 1
+"""
+import argparse
+import socket
+import threading
+import time
+
+MODES = ("ok", "hang", "flaky")
+
+
+class OtaListener:
+    def __init__(self, mode="ok", port=0, drop=1, delay=0.2):
+        if mode not in MODES:
+            raise ValueError(f"modo inválido: {mode}")
+        self.mode = mode
+        self.drop = drop
+        self.delay = delay
+        self.connections = 0
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._server = socket.create_server(("127.0.0.1", port))
+        self.port = self._server.getsockname()[1]
+
+    @property
+    def address(self):
+        return f"127.0.0.1:{self.port}"
+
+    def start(self):
+        threading.Thread(target=self._accept_loop, daemon=True).start()
+        return self
+
+    def close(self):
+        self._closed.set()
+        self._server.close()
+
+    def _accept_loop(self):
+        while True:
+            try:
+                connection, _ = self._server.accept()
+            except OSError:
+                return
+            with self._lock:
+                self.connections += 1
+                attempt = self.connections
+            threading.Thread(target=self._handle, args=(connection, attempt), daemon=True).start()
+
+    def _handle(self, connection, attempt):
+        with connection:
+            if self.mode == "hang":
+                # segura a conexão sem responder até o listener ser fechado
+                self._closed.wait()
+                return
+            if self.mode == "flaky" and attempt <= self.drop:
+                return
+            received = 0
+            while True:
+                data = connection.recv(65536)
+                if not data:
+                    break
+                received += len(data)
+            # simula a gravação na flash antes de confirmar
+            time.sleep(self.delay)
+            connection.sendall(f"OK {received}".encode())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=3232)
+    parser.add_argument("--mode", choices=MODES, default="ok")
+    parser.add_argument("--drop", type=int, default=1, help="Conexões derrubadas no modo flaky.")
+    args = parser.parse_args()
+
+    listener = OtaListener(args.mode, args.port, args.drop).start()
+    print(f"ouvindo em {listener.address} (modo {args.mode})", flush=True)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        listener.close()
+
+
+if __name__ == "__main__":
+    main()
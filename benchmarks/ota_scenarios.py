@@ -0,0 +1,141 @@
+"""Cenários de falha dos jobs de OTA contra dispositivos falsos.
+
+Sobe o servidor real com um banco SQLite temporário e o esphome falso, cria um
+dispositivo por cenário e dispara um único lote em /api/ota, cada dispositivo
+apontando para um ota_listener.py local:
+
+- success: o dispositivo responde na primeira tentativa;
+- refused: nada escuta na porta, todas as tentativas falham;
+- timeout: o dispositivo aceita a conexão e trava, cada tentativa estoura o OTA_TIMEOUT;
+- retry: a primeira conexão cai sem resposta e a segunda tentativa conclui.
+
+Imprime o resultado em JSON e sai com código 1 se algum cenário divergir do esperado.
+
+    python benchmarks/ota_scenarios.py --timeout 1 --retries 2 --backoff 0.2
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+from job_load import FAKE_ESPHOME, ROOT, free_port, request, start_server
+from ota_listener import OtaListener
+
+
+def unused_address():
+    # porta livre sem ninguém escutando: a conexão é recusada
+    return f"127.0.0.1:{free_port()}"
+
+
+def wait_batch(base_url, batch_id, deadline):
+    while time.monotonic() < deadline:
+        summary = request(base_url, f"/api/builds/{batch_id}")
+        if summary["finished"] == summary["total"]:
+            return summary
+        time.sleep(0.2)
+    raise RuntimeError(f"o lote {batch_id} não terminou a tempo")
+
+
+def read_log(base_url, job_id):
+    return "".join(request(base_url, f"/jobs/{job_id}/log?limit=10000")["lines"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--timeout", type=float, default=1, help="OTA_TIMEOUT de cada tentativa.")
+    parser.add_argument("--retries", type=int, default=2, help="OTA_RETRIES.")
+    parser.add_argument("--backoff", type=float, default=0.2, help="OTA_RETRY_BACKOFF.")
+    args = parser.parse_args()
+
+    attempts = args.retries + 1
+    listeners = {
+        "success": OtaListener("ok").start(),
+        "timeout": OtaListener("hang").start(),
+        "retry": OtaListener("flaky", drop=1).start(),
+    }
+    scenarios = {
+        "success": {"address": listeners["success"].address, "status": "succeeded", "attempts": 1},
+        "refused": {"address": unused_address(), "status": "failed", "attempts": attempts},
+        "timeout": {"address": listeners["timeout"].address, "status": "failed", "attempts": attempts},
+        "retry": {"address": listeners["retry"].address, "status": "succeeded", "attempts": 2},
+    }
+    if args.retries < 1:
+        del scenarios["retry"]
+
+    with tempfile.TemporaryDirectory() as workdir:
+        port = free_port()
+        env = {
+            **os.environ,
+            "PYTHONPATH": ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""),
+            "DATABASE_URL": "sqlite:///" + os.path.join(workdir, "benchmark.db"),
+            "ESPHOME_EXECUTABLE": FAKE_ESPHOME,
+            "LOG_DIR": os.path.join(workdir, "logs"),
+            "OTA_TIMEOUT": str(args.timeout),
+            "OTA_RETRIES": str(args.retries),
+            "OTA_RETRY_BACKOFF": str(args.backoff),
+            "FAKE_LINES": "20",
+            "FAKE_SECONDS": "0.1",
+            "PORT": str(port),
+        }
+        os.makedirs(os.path.join(workdir, "esphome_files"))
+        server = start_server(workdir, env)
+        base_url = f"http://127.0.0.1:{port}"
+        try:
+            for name in scenarios:
+                request(base_url, "/create-device", data={
+                    "deviceName": f"ota-{name}",
+                    "platform": "esp32",
+                    "board": "esp32dev",
+                    "wifiSsid": "benchmark",
+                    "wifiPassword": "benchmark",
+                })
+            devices = request(base_url, f"/api/devices?limit={len(scenarios)}&fields=id,name")["items"]
+            device_ids = {device["name"]: device["id"] for device in devices}
+            batch = request(base_url, "/api/ota", json_body={
+                "device_ids": list(device_ids.values()),
+                "hosts": {
+                    str(device_ids[f"ota-{name}"]): scenario["address"] for name, scenario in scenarios.items()
+                },
+            })
+            # pior caso: todas as tentativas do cenário de timeout mais as esperas entre elas
+            worst_case = attempts * args.timeout + args.backoff * (2 ** args.retries) + 30
+            summary = wait_batch(base_url, batch["batch_id"], time.monotonic() + worst_case)
+            jobs = {entry["device_name"]: entry for entry in summary["devices"] if entry["kind"] == "ota"}
+            results = {}
+            for name, scenario in scenarios.items():
+                job = jobs[f"ota-{name}"]
+                log = read_log(base_url, job["job_id"])
+                result = {
+                    "status": job["status"],
+                    "attempts": 1 + log.count("Nova tentativa"),
+                    "timeouts": log.count("Tempo limite"),
+                    "wall_time": job["wall_time"],
+                }
+                if name in listeners:
+                    result["connections"] = listeners[name].connections
+                result["ok"] = (
+                    result["status"] == scenario["status"]
+                    and result["attempts"] == scenario["attempts"]
+                    and (name != "timeout" or result["timeouts"] == attempts)
+                )
+                results[name] = result
+        finally:
+            server.terminate()
+            server.wait(timeout=10)
+            for listener in listeners.values():
+                listener.close()
+
+    print(json.dumps({
+        "ota_timeout": args.timeout,
+        "ota_retries": args.retries,
+        "ota_retry_backoff": args.backoff,
+        "scenarios": results,
+    }, indent=2))
+    if not all(result["ok"] for result in results.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+"""Benchmark dos caminhos críticos de configuração e compilação.
+
+Para cada tamanho de frota cria um banco SQLite temporário com dispositivos
+sintéticos (de 0 a --max-components componentes cada) e mede:
+
+- DeviceService.update_device_config (escrevendo e com o arquivo inalterado);
+- a listagem de dispositivos (HTML e API);
+- criar/editar/excluir componentes pelo test client do Flask;
+- /select-component-form e /component-forms/<tipo>;
+- jobs de upload (compilação + gravação) usando o esphome falso.
+
+Cada frota roda em um processo separado; o resultado sai em JSON.
+
+    python benchmarks/pipeline.py --fleet 1 --fleet 100 --fleet 10000
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+from job_load import percentiles
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FAKE_ESPHOME = os.path.join(ROOT, "benchmarks", "fake_esphome.py")
+
+# os componentes sintéticos nunca usam este pino, reservado para o teste de CRUD
+FREE_PIN = "GPIO16"
+
+
+def synthetic_component(rng, index):
+    pin = f"GPIO{rng.randrange(16)}"
+    kind = rng.choice(("switch", "sensor", "number", "binary_sensor"))
+    if kind == "switch":
+        config_json = {"platform": "gpio", "name": f"Relé {index}", "pin": {"number": pin, "inverted": False}}
+    elif kind == "sensor":
+        config_json = {
+            "platform": "dht",
+            "pin": pin,
+            "model": "DHT22",
+            "temperature": {"name": f"Temperatura {index}"},
+            "humidity": {"name": f"Umidade {index}"},
+            "update_interval": "60s",
+        }
+    elif kind == "number":
+        config_json = {
+            "platform": "template",
+            "name": f"Servo {index}",
+            "min_value": -180,
+            "initial_value": 0,
+            "max_value": 180,
+            "step": 1,
+            "optimistic": True,
+            "set_action": {"then": [{"servo.write": {"id": f"servo_{index}", "level": "!lambda return x / 180.0;"}}]},
+        }
+    else:
+        config_json = {
+            "platform": "gpio",
+            "name": f"Porta {index}",
+            "pin": {"number": pin, "inverted": True},
+            "device_class": "door",
+        }
+    return kind, config_json
+
+
+def generate_fleet(db, devices, max_components, seed):
+    from src.models.component import Component
+    from src.models.device import Device
+
+    rng = random.Random(seed)
+    db.session.execute(db.insert(Device), [
+        {
+            "id": device_id,
+            "name": f"bench-{device_id:05d}",
+            "platform": "esp32",
+            "board": "esp32dev",
+            "wifi_ssid": "benchmark",
+            "wifi_password": "benchmark",
+            "ota_password": "benchmark",
+            "config_file": os.path.join("esphome_files", f"bench-{device_id:05d}.yaml"),
+            "ap_ssid": f"Bench-{device_id:05d} Fallback Hotspot",
+            "ap_password": "benchmark",
+        }
+        for device_id in range(1, devices + 1)
+    ])
+    total = 0
+    batch = []
+    for device_id in range(1, devices + 1):
+        for index in range(rng.randint(0, max_components)):
+            kind, config_json = synthetic_component(rng, index)
+            batch.append({"device_id": device_id, "component_type": kind, "config_json": config_json})
+        if len(batch) >= 50000:
+            db.session.execute(db.insert(Component), batch)
+            total += len(batch)
+            batch = []
+    if batch:
+        db.session.execute(db.insert(Component), batch)
+        total += len(batch)
+    db.session.commit()
+    return total
+
+
+def timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def sample_devices(rng, devices, count):
+    return rng.sample(range(1, devices + 1), min(count, devices))
+
+
+def bench_update_device_config(device_repository, device_service, device_ids):
+    samples = {"load": [], "write": [], "unchanged": []}
+    for device_id in device_ids:
+        elapsed, device = timed(device_repository.get_with_components, device_id)
+        samples["load"].append(elapsed)
+        # a frota sintética não tem config_hash: a primeira chamada escreve o arquivo
+        samples["write"].append(timed(device_service.update_device_config, device.config_file, device)[0])
+        samples["unchanged"].append(timed(device_service.update_device_config, device.config_file, device)[0])
+    return {name: percentiles(values) for name, values in samples.items()}
+
+
+def bench_list_devices(client, devices, iterations):
+    paths = {
+        "html_first_page": "/",
+        "html_deep_page": f"/?after={devices // 2}",
+        "api_first_page": "/api/devices?limit=100",
+        "api_component_filter": "/api/devices?limit=100&component_type=sensor",
+    }
+    results = {}
+    for name, path in paths.items():
+        samples = []
+        for _ in range(iterations):
+            elapsed, response = timed(client.get, path)
+            assert response.status_code == 200, (path, response.status_code)
+            samples.append(elapsed)
+        results[name] = percentiles(samples)
+    return results
+
+
+def bench_components(client, component_repository, device_service, device_ids):
+    samples = {"create": [], "update": [], "delete": [], "render": []}
+    form = {"componentType": "switch", "platform": "gpio", "name": "Benchmark", "pin": FREE_PIN}
+    for device_id in device_ids:
+        samples["create"].append(timed(client.post, f"/add-component/{device_id}", data=form)[0])
+        component = max(component_repository.list_by_device(device_id), key=lambda item: item.id)
+        assert component.config_json["pin"]["number"] == FREE_PIN
+        samples["update"].append(timed(
+            client.post, f"/update-component/{device_id}/{component.id}", data={**form, "inverted": "y"}
+        )[0])
+        samples["delete"].append(timed(client.post, f"/delete-component/{device_id}/{component.id}")[0])
+        # as requisições só marcam o arquivo como pendente; mede a geração em seguida
+        samples["render"].append(timed(device_service.flush_configs, [device_id])[0])
+    return {name: percentiles(values) for name, values in samples.items()}
+
+
+def bench_component_forms(client, component_types, iterations):
+    samples = {"select_post": [], "get": [], "get_not_modified": []}
+    for _ in range(iterations):
+        for component_type in component_types:
+            samples["select_post"].append(timed(
+                client.post, "/select-component-form", data={"component_type": component_type}
+            )[0])
+            elapsed, response = timed(client.get, f"/component-forms/{component_type}")
+            samples["get"].append(elapsed)
+            samples["get_not_modified"].append(timed(
+                client.get, f"/component-forms/{component_type}", headers={"If-None-Match": response.headers["ETag"]}
+            )[0])
+    return {name: percentiles(values) for name, values in samples.items()}
+
+
+def bench_upload_jobs(app, device_repository, device_service, job_repository, job_service, device_ids):
+    from src.models.job import JobStatus
+
+    started = time.perf_counter()
+    with app.app_context():
+        job_ids = []
+        for index, device_id in enumerate(device_ids):
+            # como no evento start_upload: grava o arquivo antes de enfileirar
+            device = device_repository.get_with_components(device_id)
+            device_service.update_device_config(config_file=device.config_file, device_instance=device)
+            job_ids.append(job_service.submit_upload(device, f"/dev/bench{index}").id)
+    while True:
+        # contexto novo a cada consulta: os jobs são atualizados por outras sessões
+        with app.app_context():
+            jobs = [job_repository.get(job_id) for job_id in job_ids]
+            pending = [job for job in jobs if job.status not in JobStatus.FINISHED]
+            if not pending:
+                break
+        job_service.sleep(0.05)
+    wall_time = time.perf_counter() - started
+    with app.app_context():
+        jobs = [job_repository.get(job_id) for job_id in job_ids]
+        return {
+            "jobs": len(jobs),
+            "succeeded": sum(job.status == JobStatus.SUCCEEDED for job in jobs),
+            "wall_time_s": round(wall_time, 3),
+            "jobs_per_s": round(len(jobs) / wall_time, 2),
+            "queue_wait": percentiles([(job.started_at - job.created_at).total_seconds() for job in jobs]),
+            "run_time": percentiles([(job.finished_at - job.started_at).total_seconds() for job in jobs]),
+        }
+
+
+def run_fleet(args):
+    from src.component_types import form_component_types
+    from src.database.db import db
+    from src.main import create_app
+
+    app = create_app()
+    services = app.extensions["esphome"]
+    component_repository = services.component_repository
+    device_repository = services.device_repository
+    device_service = services.device_service
+    job_repository = services.job_repository
+    job_service = services.job_service
+    # a validação roda o ESPHome de verdade em outro processo e distorceria os tempos
+    device_service.validation_service = None
+    os.makedirs("esphome_files", exist_ok=True)
+    rng = random.Random(args.seed)
+    result = {"devices": args.devices, "max_components": args.max_components}
+    with app.app_context():
+        elapsed, components = timed(generate_fleet, db, args.devices, args.max_components, args.seed)
+        result["components"] = components
+        result["generate_s"] = round(elapsed, 3)
+        result["update_device_config"] = bench_update_device_config(
+            device_repository, device_service, sample_devices(rng, args.devices, args.samples)
+        )
+        db.session.remove()
+    client = app.test_client()
+    result["list_devices"] = bench_list_devices(client, args.devices, args.samples)
+    with app.app_context():
+        result["components_crud"] = bench_components(
+            client, component_repository, device_service, sample_devices(rng, args.devices, args.samples)
+        )
+    result["component_forms"] = bench_component_forms(
+        client, [component_type.name for component_type in form_component_types()], args.samples
+    )
+    result["upload_jobs"] = bench_upload_jobs(
+        app, device_repository, device_service, job_repository, job_service,
+        sample_devices(rng, args.devices, args.uploads),
+    )
+    with open(args.output, "w") as output:
+        json.dump(result, output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fleet", type=int, action="append", help="Tamanhos de frota (padrão: 1, 100 e 10000).")
+    parser.add_argument("--max-components", type=int, default=500, help="Máximo de componentes por dispositivo.")
+    parser.add_argument("--samples", type=int, default=20, help="Medições por operação.")
+    parser.add_argument("--uploads", type=int, default=8, help="Jobs de upload por frota.")
+    parser.add_argument("--lines", type=int, default=200, help="Linhas de saída do esphome falso.")
+    parser.add_argument("--seconds", type=float, default=0.2, help="Duração de cada comando do esphome falso.")
+    parser.add_argument("--seed", type=int, default=0)
+    # uso interno: mede uma frota no processo atual
+    parser.add_argument("--devices", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--output", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.devices is not None:
+        run_fleet(args)
+        return
+
+    fleets = []
+    for devices in args.fleet or [1, 100, 10000]:
+        with tempfile.TemporaryDirectory() as workdir:
+            env = {
+                **os.environ,
+                "PYTHONPATH": ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""),
+                "DATABASE_URL": "sqlite:///" + os.path.join(workdir, "benchmark.db"),
+                "ESPHOME_EXECUTABLE": FAKE_ESPHOME,
+                "LOG_DIR": os.path.join(workdir, "logs"),
+                "FAKE_LINES": str(args.lines),
+                "FAKE_SECONDS": str(args.seconds),
+                # sem a espera do write-behind, "render" mede só a geração do arquivo
+                "CONFIG_WRITE_DELAY": "0",
+            }
+            env.pop("FLASK_RUN_FROM_CLI", None)
+            subprocess.run(
+                [sys.executable, "-m", "flask", "--app", "src.main", "db", "upgrade"],
+                cwd=workdir, env=env, check=True, capture_output=True,
+            )
+            output = os.path.join(workdir, "result.json")
+            subprocess.run(
+                [
+                    sys.executable, os.path.abspath(__file__),
+                    "--devices", str(devices),
+                    "--max-components", str(args.max_components),
+                    "--samples", str(args.samples),
+                    "--uploads", str(args.uploads),
+                    "--seed", str(args.seed),
+                    "--output", output,
+                ],
+                cwd=workdir, env=env, check=True, stdout=subprocess.DEVNULL,
+            )
+            with open(output) as result:
+                fleets.append(json.load(result))
+
+    print(json.dumps({
+        "max_components": args.max_components,
+        "samples": args.samples,
+        "fake_esphome": {"lines": args.lines, "seconds": args.seconds},
+        "fleets": fleets,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Mede o tempo de inicialização do servidor e dos comandos do CLI.
+
+Roda cada comando várias vezes com `python -X importtime` em um banco SQLite
+temporário e imprime em JSON o tempo total (mediana), o tempo gasto em imports
+e quanto custou cada módulo pesado que foi carregado.
+
+    python benchmarks/startup.py --repeat 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+COMMANDS = {
+    "server": ["-c", "from src.main import create_app; create_app()"],
+    "cli_help": ["-m", "flask", "--app", "src.main", "--help"],
+    "db_current": ["-m", "flask", "--app", "src.main", "db", "current"],
+}
+
+# módulos que só deveriam ser carregados por quem precisa deles
+WATCHED_MODULES = (
+    "flask_socketio", "eventlet", "flask_alembic", "flask_wtf", "yaml", "serial", "esphome",
+)
+
+
+def parse_importtime(stderr):
+    modules = {}
+    total = 0
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # o nome vem recuado conforme a profundidade do import
+        name = name[1:]
+        if not name.startswith(" "):
+            total += int(cumulative)
+        modules.setdefault(name.strip(), int(cumulative))
+    return total, modules
+
+
+def run(command, env, workdir):
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", *command],
+        cwd=workdir, env=env, capture_output=True, text=True,
+    )
+    wall_time = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(f"{' '.join(command)} falhou:\n{result.stderr[-2000:]}")
+    return wall_time, *parse_importtime(result.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="Execuções por comando (vale a mediana).")
+    parser.add_argument("--command", action="append", choices=sorted(COMMANDS), help="Comandos medidos.")
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        env = {
+            **os.environ,
+            "PYTHONPATH": ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""),
+            "DATABASE_URL": "sqlite:///" + os.path.join(workdir, "startup.db"),
+        }
+        env.pop("FLASK_RUN_FROM_CLI", None)
+        for name in args.command or COMMANDS:
+            runs = [run(COMMANDS[name], env, workdir) for _ in range(args.repeat)]
+            wall_times = [wall_time for wall_time, _, _ in runs]
+            import_times = [import_time for _, import_time, _ in runs]
+            modules = runs[-1][2]
+            results[name] = {
+                "wall_ms": round(statistics.median(wall_times) * 1000, 1),
+                "import_ms": round(statistics.median(import_times) / 1000, 1),
+                "modules_ms": {
+                    module: round(modules[module] / 1000, 1) for module in WATCHED_MODULES if module in modules
+                },
+            }
+
+    print(json.dumps({"repeat": args.repeat, "python": sys.version.split()[0], "commands": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
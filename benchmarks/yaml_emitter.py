@@ -0,0 +1,156 @@
+"""Compara o gerador de YAML antigo (convert_tags + yaml.Dumper) com dict_to_yaml.
+
+Gera dispositivos sintéticos com centenas de componentes, confere que a saída
+é idêntica byte a byte (inclusive com emojis e outros caracteres fora do BMP)
+e imprime os tempos em JSON.
+
+    python benchmarks/yaml_emitter.py --devices 20 --components 300
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+import yaml
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.component_types import yaml_sections  # noqa: E402
+from src.utils import config_dumper, dict_to_yaml, has_astral_characters  # noqa: E402
+
+
+class LambdaStr(str):
+    pass
+
+
+class LegacyDumper(yaml.Dumper):
+    pass
+
+
+LegacyDumper.add_representer(LambdaStr, lambda dumper, data: dumper.represent_scalar("!lambda", data))
+
+
+def convert_tags(obj):
+    if isinstance(obj, dict):
+        return {k: convert_tags(v) for k, v in obj.items()}
+    elif isinstance(obj, list):
+        return [convert_tags(i) for i in obj]
+    elif isinstance(obj, str) and obj.startswith("!lambda "):
+        return LambdaStr(obj[len("!lambda "):])
+    return obj
+
+
+def legacy_dict_to_yaml(obj):
+    return yaml.dump(convert_tags(obj), Dumper=LegacyDumper, sort_keys=False, allow_unicode=True)
+
+
+def component(rng, index):
+    pin = f"GPIO{rng.randrange(18)}"
+    kind = rng.choice(("switch", "sensor", "servo", "binary_sensor"))
+    if kind == "switch":
+        name = rng.choice(("Luz", "Relé", "Bomba d'água", "on", "yes")) + f" {index}"
+        if rng.random() < 0.01:
+            # caracteres fora do BMP: a libyaml os escaparia, dict_to_yaml volta para o emissor em Python
+            name += rng.choice((" 💡", " 🚿", " 𝔸"))
+        return "switch", {
+            "platform": "gpio",
+            "name": name,
+            "pin": {"number": pin, "inverted": rng.random() < 0.5},
+        }
+    if kind == "sensor":
+        return "sensor", {
+            "platform": "dht",
+            "pin": pin,
+            "model": rng.choice(("DHT11", "DHT22")),
+            "temperature": {"name": f"Temperatura da sala {index}"},
+            "humidity": {"name": f"Umidade da sala {index}"},
+            "update_interval": f"{rng.randrange(1, 600)}s",
+        }
+    if kind == "binary_sensor":
+        return "binary_sensor", {
+            "platform": "gpio",
+            "name": f"Sensor binário com um nome bem comprido para forçar a quebra de linha {index}",
+            "pin": {"number": pin, "inverted": False},
+            "device_class": rng.choice(("door", "window", "motion")),
+        }
+    max_value = rng.randrange(90, 270)
+    return "number", {
+        "platform": "template",
+        "name": f"Servo {index}",
+        "min_value": -max_value,
+        "initial_value": 0,
+        "max_value": max_value,
+        "step": 1,
+        "optimistic": True,
+        "set_action": {
+            "then": [
+                {"servo.write": {"id": f"servo_{index}", "level": f"!lambda return x / {float(max_value)};"}},
+            ]
+        },
+    }
+
+
+def synthetic_device(rng, components):
+    sections = {section: [] for section in yaml_sections()}
+    for index in range(components):
+        section, config_json = component(rng, index)
+        sections[section].append(config_json)
+    return sections
+
+
+def render(emitter, devices):
+    return [
+        "".join(emitter({section: configs}) for section, configs in sections.items() if configs)
+        for sections in devices
+    ]
+
+
+def timed(emitter, devices, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = render(emitter, devices)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, output
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, default=20, help="Dispositivos sintéticos.")
+    parser.add_argument("--components", type=int, default=300, help="Componentes por dispositivo.")
+    parser.add_argument("--repeat", type=int, default=3, help="Repetições (vale o melhor tempo).")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    devices = [synthetic_device(rng, args.components) for _ in range(args.devices)]
+    legacy_time, legacy_output = timed(legacy_dict_to_yaml, devices, args.repeat)
+    new_time, new_output = timed(dict_to_yaml, devices, args.repeat)
+    mismatches = [
+        index for index, (old, new) in enumerate(zip(legacy_output, new_output))
+        if old.encode("utf-8") != new.encode("utf-8")
+    ]
+
+    print(json.dumps({
+        "devices": args.devices,
+        "components_per_device": args.components,
+        "dumper": config_dumper().__mro__[1].__name__,
+        "bytes": sum(len(output.encode("utf-8")) for output in new_output),
+        "python_fallback_sections": sum(
+            has_astral_characters(configs) for sections in devices for configs in sections.values()
+        ),
+        "legacy_s": round(legacy_time, 4),
+        "new_s": round(new_time, 4),
+        "speedup": round(legacy_time / new_time, 2),
+        "identical": not mismatches,
+        "mismatched_devices": mismatches,
+    }, indent=2))
+    if mismatches:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+from flask import render_template
+from src.forms import BinarySensorGPIOForm, SensorDhtForm, ServoForm, SwitchGPIOForm
+from src.utils import hash_config
+
+
+class ComponentType:
+    def __init__(self, name, label=None, form_class=None, template=None, serializer=None, section=None):
+        self.name = name
+        self.label = label
+        self.form_class = form_class
+        self.template = template
+        # recebe os dados do formulário e devolve {tipo: config_json}; tipos além do próprio
+        # são componentes filhos criados junto (ex.: output e number de um servo)
+        self.serializer = serializer
+        # seção do YAML em que o componente é gerado
+        self.section = section or name
+        self._form_html = None
+        self._form_etag = None
+
+    def serialize(self, form_data):
+        return self.serializer(form_data)
+
+    def render_form(self):
+        # o formulário vazio é sempre igual: renderiza uma vez por processo
+        if self._form_html is None:
+            self._form_html = render_template(self.template, form=self.form_class())
+            self._form_etag = hash_config(self._form_html)
+        return self._form_html
+
+    @property
+    def form_etag(self):
+        self.render_form()
+        return self._form_etag
+
+
+def pin_config(form_data):
+    return {
+        "number": form_data.get("pin"),
+        "inverted": True if form_data.get("inverted") == "y" else False,
+    }
+
+
+def switch_configs(form_data):
+    return {
+        "switch": {
+            "platform": form_data.get("platform"),
+            "name": form_data.get("name"),
+            "pin": pin_config(form_data),
+        },
+    }
+
+
+def sensor_configs(form_data):
+    return {
+        "sensor": {
+            "platform": form_data.get("platform"),
+            "pin": form_data.get("pin"),
+            "model": form_data.get("model"),
+            "temperature": {
+                "name": form_data.get("temperature_name")
+            },
+            "humidity": {
+                "name": form_data.get("humidity_name")
+            },
+            "update_interval": f'{form_data.get("update_interval")}s',
+        },
+    }
+
+
+def servo_configs(form_data):
+    return {
+        "servo": {
+            "id": form_data.get("servo_id"),
+            "output": form_data.get("output_id"),
+        },
+        "output": {
+            "platform": form_data.get("platform"),
+            "id": form_data.get("output_id"),
+            "pin": form_data.get("pin"),
+            "frequency": f'{form_data.get("frequency")} Hz',
+        },
+        "number": {
+            "platform": "template",
+            "name": form_data.get("name"),
+            "min_value": form_data.get("min_value", type=int),
+            "initial_value": form_data.get("initial_value", type=int),
+            "max_value": form_data.get("max_value", type=int),
+            "step": form_data.get("step", type=int),
+            "optimistic": True,
+            "set_action": {
+                "then": [
+                    {
+                        "servo.write": {
+                            "id": form_data.get("servo_id"),
+                            "level": f"!lambda return x / {float(form_data.get('max_value'))};"
+                        },
+                    },
+                ]
+            },
+        },
+    }
+
+
+def binary_sensor_configs(form_data):
+    return {
+        "binary_sensor": {
+            "platform": form_data.get("platform"),
+            "name": form_data.get("name"),
+            "pin": pin_config(form_data),
+            **({"device_class": form_data.get("device_class")} if form_data.get("device_class") else {}),
+        },
+    }
+
+
+COMPONENT_TYPES = {}
+
+
+def register_component_type(component_type):
+    COMPONENT_TYPES[component_type.name] = component_type
+    return component_type
+
+
+def get_component_type(name):
+    return COMPONENT_TYPES.get(name)
+
+
+def form_component_types():
+    return [component_type for component_type in COMPONENT_TYPES.values() if component_type.form_class is not None]
+
+
+def yaml_sections():
+    return tuple(dict.fromkeys(component_type.section for component_type in COMPONENT_TYPES.values()))
+
+
+# a ordem de registro define a ordem das seções no arquivo YAML gerado
+register_component_type(ComponentType("switch", "Switch", SwitchGPIOForm, "components/switch.html", switch_configs))
+register_component_type(ComponentType("sensor", "Sensor DHT", SensorDhtForm, "components/sensor.html", sensor_configs))
+register_component_type(ComponentType("number"))
+register_component_type(ComponentType("servo", "Servo Motor", ServoForm, "components/servo.html", servo_configs))
+register_component_type(ComponentType("output"))
+register_component_type(
+    ComponentType("binary_sensor", "Sensor Binário", BinarySensorGPIOForm, "components/binary_sensor.html", binary_sensor_configs)
+)
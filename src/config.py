@@ -1,3 +1,25 @@
+import os
+
+
 class Config:
     def __init__(self):
         self.esphome_dir = "esphome_files"
+        self.devices_per_page = int(os.environ.get("DEVICES_PER_PAGE", 100))
+        self.esphome_executable = os.environ.get("ESPHOME_EXECUTABLE", "esphome")
+        self.firmware_dir = os.path.join(self.esphome_dir, ".firmware")
+        self.lock_dir = os.path.join(self.esphome_dir, ".locks")
+        self.firmware_cache_max_bytes = int(os.environ.get("FIRMWARE_CACHE_MAX_BYTES", 2 * 1024 * 1024 * 1024))
+        self.render_workers = int(os.environ.get("RENDER_WORKERS", os.cpu_count() or 1))
+        self.render_pool_min_devices = int(os.environ.get("RENDER_POOL_MIN_DEVICES", 200))
+        self.config_write_delay = float(os.environ.get("CONFIG_WRITE_DELAY", 0.05))
+        self.build_cache_dir = os.environ.get("BUILD_CACHE_DIR", os.path.join(self.esphome_dir, ".build-cache"))
+        self.platformio_core_dir = os.environ.get("PLATFORMIO_CORE_DIR")
+        self.build_workers = int(os.environ.get("BUILD_WORKERS", os.cpu_count() or 1))
+        self.flash_workers = int(os.environ.get("FLASH_WORKERS", 4))
+        self.ota_workers = int(os.environ.get("OTA_WORKERS", 16))
+        self.ota_timeout = float(os.environ.get("OTA_TIMEOUT", 120))
+        self.ota_retries = int(os.environ.get("OTA_RETRIES", 2))
+        self.ota_retry_backoff = float(os.environ.get("OTA_RETRY_BACKOFF", 5))
+        self.log_dir = os.environ.get("LOG_DIR", "logs")
+        self.log_max_bytes = int(os.environ.get("LOG_MAX_BYTES", 500 * 1024 * 1024))
+        self.log_max_age_days = int(os.environ.get("LOG_MAX_AGE_DAYS", 30))
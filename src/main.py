@@ -1,199 +1,435 @@
-import subprocess
+import json
+import os
 import threading
-from flask import Flask, request, jsonify, render_template_string
-from flask_alembic import Alembic
-from flask_socketio import SocketIO
+from types import SimpleNamespace
+import click
+from flask import Flask, request, jsonify, send_file
 from src.database.db import db
-from src.forms import BinarySensorGPIOForm, SwitchGPIOForm, SensorDhtForm, ServoForm
-from src.utils import list_serial_ports
+from src.models.job import JobStatus
+from src.component_types import get_component_type
 from src.repositories.device import DeviceRepository
 from src.repositories.component import ComponentRepository
+from src.repositories.job import JobRepository
+from src.repositories.validation import ConfigValidationRepository
+from src.repositories.template import DeviceTemplateRepository
 from src.services.device import DeviceService
 from src.services.component import ComponentService
+from src.services.template import TemplateService
+from src.services.job import JobService
+from src.services.build import BuildService
+from src.services.log_stream import LogStreamer, device_room
+from src.services.log_store import LogStore
+from src.services.validation import ValidationService
+from src.services.firmware_store import FirmwareStore
+from src.services.build_environment import BuildEnvironmentManager
+from src.services.port_registry import PortRegistry
+from src.runtime import ThreadingRuntime, runtime_for
+from src.utils import is_id_list
 
 
-device_repository = DeviceRepository()
-component_repository = ComponentRepository()
-
-device_service = DeviceService(
-    device_repository=device_repository,
-    component_repository=component_repository,
-)
-component_service = ComponentService(
-    component_repository=component_repository,
-    device_repository=device_repository,
-    device_service=device_service,
-)
-
-alembic = Alembic()
-
-app = Flask(__name__)
-app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///database.db"
-app.config["SECRET_KEY"] = "super-secret-key"
-
-db.init_app(app)
-alembic.init_app(app)
-
-socketio = SocketIO(app)
-
-@app.route("/create-device", methods=["POST"])
-def create_device():
-    return device_service.create_device(request)
-
-@app.route("/")
-def list_devices():
-    return device_service.list_devices()
-
-@app.route("/delete-device/<int:device_id>", methods=["POST"])
-def delete_device(device_id):
-    return device_service.delete_device(device_id)
-
-@app.route("/edit-device/<int:device_id>", methods=["GET", "POST"])
-def edit_device(device_id):
-    return device_service.update_device(device_id=device_id, request=request)
-
-@app.route("/available-ports")
-def list_available_ports():
-    return list_serial_ports()
-
-@socketio.on("start_upload")
-def handle_upload(data):
-    device_id = data["device_id"]
-    serial_port = data["serial_port"]
-    device = device_repository.get(device_id)
-    if not device:
-        socketio.emit("log", {"line": "[Erro] Dispositivo não encontrado."})
-        return
-    def run_command():
-        command = ["esphome", "run", device.config_file, "--device", serial_port]
-        # command = ["ping", "-c", "5", "google.com"]
-        process = subprocess.Popen(
-            command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True
-        )
-        for line in iter(process.stdout.readline, ""):
-            socketio.emit("log", {"line": line, "device_id": device_id})
-        process.stdout.close()
-        process.wait()
-    threading.Thread(target=run_command).start()
-
-@app.route("/add-component/<int:device_id>", methods=["POST"])
-def add_component(device_id):
-    return component_service.create_component(device_id=device_id, request=request)
-
-@app.route("/delete-component/<int:device_id>/<int:component_id>", methods=["POST"])
-def delete_component(device_id, component_id):
-    return component_service.delete_component(device_id=device_id, component_id=component_id)
-
-@app.route("/update-component/<int:device_id>/<int:component_id>", methods=["POST"])
-def update_component(device_id, component_id):
-    return component_service.update_component(device_id=device_id, component_id=component_id, request=request)
-
-forms = {
-    "switch": {
-        "form_class": SwitchGPIOForm,
-        "template": """
-        <div class="mb-3">
-            {{ form.platform.label(class="form-label") }} {{ form.platform(class="form-select") }}
-        </div>
-        <div class="mb-3">
-            {{ form.name.label(class="form-label") }} {{ form.name(class="form-control") }}
-        </div>
-        <div class="mb-3">
-            {{ form.pin.label(class="form-label") }} {{ form.pin(class="form-select") }}
-        </div>
-        <div class="mb-3 form-check form-switch">
-            {{ form.inverted.label(class="form-check-label") }} {{ form.inverted(class="form-check-input", type="checkbox") }}
-        </div>
-        """,
-    },
-    "sensor": {
-        "form_class": SensorDhtForm,
-        "template": """
-        <div class="mb-3">
-            {{ form.platform.label(class="form-label") }} {{ form.platform(class="form-select") }}
-        </div>
-        <div class="mb-3">
-            {{ form.pin.label(class="form-label") }} {{ form.pin(class="form-select") }}
-        </div>
-        <div class="mb-3">
-            {{ form.model.label(class="form-label") }} {{ form.model(class="form-select") }}
-        </div>
-        <div class="mb-3">
-            {{ form.temperature_name.label(class="form-label") }} {{ form.temperature_name(class="form-control") }}
-        </div>
-        <div class="mb-3">
-            {{ form.humidity_name.label(class="form-label") }} {{ form.humidity_name(class="form-control") }}
-        </div>
-        <div class="mb-3">
-            {{ form.update_interval.label(class="form-label") }} {{ form.update_interval(class="form-control", type="number") }}
-        </div>
-        """,
-    },
-    "servo": {
-        "form_class": ServoForm,
-        "template": """
-        <div class="mb-3">
-            {{ form.name.label(class="form-label") }} {{ form.name(class="form-control") }}
-        </div>
-        <div class="mb-3">
-            {{ form.servo_id.label(class="form-label") }} {{ form.servo_id(class="form-control") }}
-        </div>
-        <div class="mb-3">
-            {{ form.platform.label(class="form-label") }} {{ form.platform(class="form-select") }}
-        </div>
-        <div class="mb-3">
-            {{ form.output_id.label(class="form-label") }} {{ form.output_id(class="form-control") }}
-        </div>
-        <div class="mb-3">
-            {{ form.pin.label(class="form-label") }} {{ form.pin(class="form-select") }}
-        </div>
-        <div class="mb-3">
-            {{ form.frequency.label(class="form-label") }} {{ form.frequency(class="form-control", type="number") }}
-        </div>
-        <div class="mb-3">
-            {{ form.min_value.label(class="form-label") }} {{ form.min_value(class="form-control", type="number") }}
-        </div>
-        <div class="mb-3">
-            {{ form.max_value.label(class="form-label") }} {{ form.max_value(class="form-control", type="number") }}
-        </div>
-        <div class="mb-3">
-            {{ form.initial_value.label(class="form-label") }} {{ form.initial_value(class="form-control", type="number") }}
-        </div>
-        <div class="mb-3">
-            {{ form.step.label(class="form-label") }} {{ form.step(class="form-control", type="number") }}
-        </div>
-        """,
-    },
-    "binary_sensor": {
-        "form_class": BinarySensorGPIOForm,
-        "template": """
-        <div class="mb-3">
-            {{ form.platform.label(class="form-label") }} {{ form.platform(class="form-select") }}
-        </div>
-        <div class="mb-3">
-            {{ form.name.label(class="form-label") }} {{ form.name(class="form-control") }}
-        </div>
-        <div class="mb-3">
-            {{ form.pin.label(class="form-label") }} {{ form.pin(class="form-select") }}
-        </div>
-        <div class="mb-3">
-            {{ form.device_class.label(class="form-label") }} {{ form.device_class(class="form-select") }}
-        </div>
-        <div class="mb-3 form-check form-switch">
-            {{ form.inverted.label(class="form-check-label") }} {{ form.inverted(class="form-check-input", type="checkbox") }}
-        </div>
-        """,
-    },
-}
-
-@app.route("/select-component-form", methods=["POST"])
-def select_component_form():
-    component_type = request.form.get("component_type")
-    component_form = forms.get(component_type)
-    if not component_form:
-        return jsonify({"html": "<div>Tipo inválido</div>"}), 400
-    html = render_template_string(
-        component_form.get("template"),
-        form=component_form.get("form_class")(),
+def create_services():
+    device_repository = DeviceRepository()
+    component_repository = ComponentRepository()
+    job_repository = JobRepository()
+    validation_repository = ConfigValidationRepository()
+    template_repository = DeviceTemplateRepository()
+
+    validation_service = ValidationService(validation_repository=validation_repository)
+    device_service = DeviceService(
+        device_repository=device_repository,
+        component_repository=component_repository,
+        validation_service=validation_service,
+    )
+    component_service = ComponentService(
+        component_repository=component_repository,
+        device_repository=device_repository,
+        device_service=device_service,
+    )
+    template_service = TemplateService(
+        template_repository=template_repository,
+        device_repository=device_repository,
+        component_repository=component_repository,
+        device_service=device_service,
+        component_service=component_service,
+    )
+    firmware_store = FirmwareStore()
+    build_environment = BuildEnvironmentManager(job_repository=job_repository)
+    job_service = JobService(
+        job_repository=job_repository,
+        device_repository=device_repository,
+        firmware_store=firmware_store,
+        build_environment=build_environment,
     )
-    return jsonify({ "html": html })
+    build_service = BuildService(
+        device_repository=device_repository,
+        job_repository=job_repository,
+        device_service=device_service,
+        job_service=job_service,
+    )
+    return SimpleNamespace(
+        device_repository=device_repository,
+        component_repository=component_repository,
+        job_repository=job_repository,
+        validation_repository=validation_repository,
+        template_repository=template_repository,
+        validation_service=validation_service,
+        device_service=device_service,
+        component_service=component_service,
+        template_service=template_service,
+        firmware_store=firmware_store,
+        build_environment=build_environment,
+        job_service=job_service,
+        build_service=build_service,
+        log_store=LogStore(),
+        log_streamer=LogStreamer(),
+        port_registry=PortRegistry(job_repository=job_repository),
+        # criado por init_socketio apenas quando o app atende requisições
+        socketio=None,
+    )
+
+def register_job_handlers(services):
+    def handle_job_output(job_id, device_id, lines):
+        first_line = services.log_store.append(job_id, lines)
+        services.log_streamer.push(job_id, device_id, lines, first_line)
+
+    def handle_job_finished(job):
+        if job["status"] in JobStatus.FINISHED:
+            services.log_store.close(job["id"])
+            services.log_store.rotate()
+
+    def emit_job_status(job):
+        if services.socketio is not None:
+            services.socketio.emit("job_status", job)
+
+    def emit_build_progress(job):
+        if services.socketio is not None and job["batch_id"] and job["status"] in JobStatus.FINISHED:
+            services.socketio.emit("build_progress", {**services.build_service.progress(job["batch_id"]), "job": job})
+
+    def record_port_flash(job):
+        if job["kind"] == "upload" and job["status"] == JobStatus.SUCCEEDED:
+            services.port_registry.record_flash(job["serial_port"], job["device_id"], job["device_name"])
+
+    services.job_service.add_output_handler(handle_job_output)
+    services.job_service.add_status_handler(handle_job_finished)
+    services.job_service.add_status_handler(emit_job_status)
+    services.job_service.add_status_handler(emit_build_progress)
+    services.job_service.add_status_handler(record_port_flash)
+
+def running_from_cli():
+    # o Flask define essa variável em todos os comandos do `flask`, inclusive no `flask run`
+    return os.environ.get("FLASK_RUN_FROM_CLI") == "true"
+
+def create_app():
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL", "sqlite:///database.db")
+    app.config["SECRET_KEY"] = "super-secret-key"
+
+    # uma instância dos serviços por app: nada é criado ao importar o módulo
+    services = app.extensions["esphome"] = create_services()
+    db.init_app(app)
+    services.validation_service.init_app(app)
+    services.port_registry.init_app(app)
+    register_job_handlers(services)
+    register_routes(app)
+    register_commands(app)
+    if running_from_cli():
+        # migrações só fazem sentido no CLI; websockets só quando há requisições (flask run)
+        from flask_alembic import Alembic
+        Alembic(app)
+        app.wsgi_app = LazySocketIO(app)
+        runtime = ThreadingRuntime()
+    else:
+        runtime = runtime_for(init_socketio(app).async_mode)
+    services.device_service.init_app(app, runtime=runtime)
+    services.job_service.init_app(app, runtime=runtime)
+    return app
+
+class LazySocketIO:
+    def __init__(self, app):
+        self.app = app
+        self.wsgi_app = app.wsgi_app
+        self._lock = threading.Lock()
+
+    def __call__(self, environ, start_response):
+        with self._lock:
+            if self.app.wsgi_app is self:
+                self.app.wsgi_app = self.wsgi_app
+                init_socketio(self.app)
+        return self.app.wsgi_app(environ, start_response)
+
+def init_socketio(app):
+    from flask_socketio import SocketIO, emit, join_room, leave_room
+
+    services = app.extensions["esphome"]
+    socketio = services.socketio = SocketIO(app)
+    services.log_streamer.init_socketio(socketio)
+    services.port_registry.init_socketio(socketio)
+    # a tarefa só roda quando o loop do servidor começa; os jobs podem gerar saída antes do primeiro cliente
+    services.log_streamer.start()
+
+    @socketio.on("connect")
+    def handle_connect():
+        services.port_registry.start()
+
+    @socketio.on("join_device")
+    def handle_join_device(data):
+        join_room(device_room(data["device_id"]))
+
+    @socketio.on("leave_device")
+    def handle_leave_device(data):
+        leave_room(device_room(data["device_id"]))
+
+    @socketio.on("start_upload")
+    def handle_upload(data):
+        device_id = data["device_id"]
+        serial_port = data["serial_port"]
+        # não grava um arquivo desatualizado: espera as edições pendentes do dispositivo
+        services.device_service.flush_configs([device_id])
+        device = services.device_repository.get(device_id)
+        if not device:
+            emit("log_batch", {"device_id": device_id, "lines": ["[Erro] Dispositivo não encontrado.\n"], "dropped": 0})
+            return
+        join_room(device_room(device_id))
+        services.device_service.update_device_config(config_file=device.config_file, device_instance=device)
+        job = services.job_service.submit_upload(device, serial_port)
+        return {"job_id": job.id}
+
+    return socketio
+
+def register_routes(app):
+    services = app.extensions["esphome"]
+
+    @app.route("/create-device", methods=["POST"])
+    def create_device():
+        return services.device_service.create_device(request)
+
+    @app.route("/")
+    def list_devices():
+        return services.device_service.list_devices(after_id=request.args.get("after", type=int))
+
+    @app.route("/delete-device/<int:device_id>", methods=["POST"])
+    def delete_device(device_id):
+        return services.device_service.delete_device(device_id)
+
+    @app.route("/edit-device/<int:device_id>", methods=["GET", "POST"])
+    def edit_device(device_id):
+        return services.device_service.update_device(device_id=device_id, request=request)
+
+    @app.route("/available-ports")
+    def list_available_ports():
+        return services.port_registry.list_ports()
+
+    @app.route("/jobs")
+    def list_jobs():
+        jobs = services.job_service.list_jobs(
+            limit=request.args.get("limit", 50, type=int),
+            device_id=request.args.get("device_id", type=int),
+        )
+        return jsonify([services.job_service.serialize_job(job) for job in jobs])
+
+    @app.route("/jobs/<int:job_id>")
+    def get_job(job_id):
+        job = services.job_service.get_job(job_id)
+        if job is None:
+            return jsonify({"error": "Job não encontrado"}), 404
+        return jsonify(services.job_service.serialize_job(job))
+
+    @app.route("/jobs/<int:job_id>/log")
+    def get_job_log(job_id):
+        if services.job_service.get_job(job_id) is None:
+            return jsonify({"error": "Job não encontrado"}), 404
+        return jsonify(services.log_store.read(
+            job_id,
+            offset=request.args.get("offset", 0, type=int),
+            tail=request.args.get("tail", type=int),
+            limit=min(request.args.get("limit", 1000, type=int), 10000),
+        ))
+
+    @app.route("/jobs/<int:job_id>/cancel", methods=["POST"])
+    def cancel_job(job_id):
+        if not services.job_service.cancel(job_id):
+            return jsonify({"error": "Job não está em execução nem na fila"}), 409
+        return jsonify(services.job_service.serialize_job(services.job_service.get_job(job_id)))
+
+    @app.route("/api/devices")
+    def list_devices_api():
+        return services.device_service.list_devices_api(request.args)
+
+    @app.route("/api/devices/<int:device_id>/components")
+    def list_components_api(device_id):
+        return services.component_service.list_components_api(device_id=device_id, args=request.args)
+
+    @app.route("/api/devices/<int:device_id>/components", methods=["PUT"])
+    def replace_components_api(device_id):
+        # sem corpo válido não há o que substituir: None vira 400, nunca "apagar tudo"
+        return services.component_service.apply_components(
+            device_id=device_id, data=request.get_json(silent=True), replace=True
+        )
+
+    @app.route("/api/devices/<int:device_id>/components/bulk", methods=["POST"])
+    def bulk_components_api(device_id):
+        return services.component_service.apply_components(device_id=device_id, data=request.get_json(silent=True))
+
+    @app.route("/api/devices/<int:device_id>/validation")
+    def get_device_validation(device_id):
+        return services.device_service.get_validation(device_id)
+
+    @app.route("/api/validate", methods=["POST"])
+    def validate_devices():
+        # corpo vazio valida todos; JSON inválido não pode virar "validar todos"
+        data = request.get_json(silent=True) if request.get_data() else {}
+        if not isinstance(data, dict):
+            return jsonify({"error": "O corpo da requisição deve ser um objeto JSON"}), 400
+        if data.get("device_ids") is not None and not is_id_list(data["device_ids"]):
+            return jsonify({"error": "device_ids deve ser uma lista de ids inteiros"}), 400
+        return jsonify(services.device_service.validate_devices(device_ids=data.get("device_ids")))
+
+    @app.route("/api/devices/<int:device_id>/firmware")
+    def get_device_firmware(device_id):
+        device = services.device_repository.get(device_id)
+        if device is None:
+            return jsonify({"error": "Dispositivo não encontrado"}), 404
+        firmware = services.firmware_store.get(device.config_hash) if device.config_hash else None
+        if firmware is None:
+            return jsonify({"error": "Firmware não compilado para a configuração atual"}), 404
+        return send_file(
+            os.path.abspath(firmware),
+            mimetype="application/octet-stream",
+            as_attachment=True,
+            download_name=f"{device.name}.bin",
+            etag=services.firmware_store.key(device.config_hash),
+        )
+
+    @app.route("/api/templates")
+    def list_templates():
+        return services.template_service.list_templates()
+
+    @app.route("/api/templates", methods=["POST"])
+    def create_template():
+        return services.template_service.create_template(request.get_json(silent=True))
+
+    @app.route("/api/templates/<int:template_id>/devices", methods=["POST"])
+    def stamp_template_devices(template_id):
+        return services.template_service.stamp_devices(template_id=template_id, data=request.get_json(silent=True))
+
+    @app.route("/api/pins")
+    def pin_usage_report():
+        return services.component_service.pin_usage_report(
+            conflicts_only=request.args.get("conflicts", "0") not in ("0", "false", "")
+        )
+
+    @app.route("/api/builds", methods=["POST"])
+    def start_build():
+        data = request.get_json(silent=True)
+        # um corpo vazio não pode virar "compilar a frota inteira"
+        if not isinstance(data, dict) or (not data.get("device_ids") and data.get("dirty") is not True):
+            return jsonify({"error": "Informe os dispositivos em device_ids ou use dirty: true"}), 400
+        if data.get("device_ids") and not is_id_list(data["device_ids"]):
+            return jsonify({"error": "device_ids deve ser uma lista de ids inteiros"}), 400
+        batch_id, jobs = services.build_service.start_batch(
+            device_ids=data.get("device_ids"), dirty_only=data.get("dirty", False)
+        )
+        return jsonify(services.build_service.summarize(batch_id)), 202
+
+    @app.route("/api/ota", methods=["POST"])
+    def start_ota():
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict) or not is_id_list(data.get("device_ids")):
+            return jsonify({"error": "Informe os dispositivos em device_ids (lista de ids inteiros)"}), 400
+        hosts = data.get("hosts")
+        if hosts is not None and not (
+            isinstance(hosts, dict) and all(isinstance(host, str) and host for host in hosts.values())
+        ):
+            return jsonify({"error": "hosts deve mapear o id do dispositivo para um endereço"}), 400
+        batch_id, jobs = services.build_service.start_ota(device_ids=data["device_ids"], hosts=data.get("hosts"))
+        return jsonify(services.build_service.summarize(batch_id)), 202
+
+    @app.route("/api/builds/<batch_id>")
+    def get_build(batch_id):
+        summary = services.build_service.summarize(batch_id)
+        if summary["total"] == 0:
+            return jsonify({"error": "Lote não encontrado"}), 404
+        return jsonify(summary)
+
+    @app.route("/api/build-environments")
+    def list_build_environments():
+        return jsonify(services.build_environment.report())
+
+    @app.route("/add-component/<int:device_id>", methods=["POST"])
+    def add_component(device_id):
+        return services.component_service.create_component(device_id=device_id, request=request)
+
+    @app.route("/delete-component/<int:device_id>/<int:component_id>", methods=["POST"])
+    def delete_component(device_id, component_id):
+        return services.component_service.delete_component(device_id=device_id, component_id=component_id)
+
+    @app.route("/update-component/<int:device_id>/<int:component_id>", methods=["POST"])
+    def update_component(device_id, component_id):
+        return services.component_service.update_component(device_id=device_id, component_id=component_id, request=request)
+
+    @app.route("/select-component-form", methods=["POST"])
+    def select_component_form():
+        component_type = get_component_type(request.form.get("component_type"))
+        if component_type is None or component_type.form_class is None:
+            return jsonify({"html": "<div>Tipo inválido</div>"}), 400
+        return jsonify({ "html": component_type.render_form() })
+
+    @app.route("/component-forms/<component_type>")
+    def component_form(component_type):
+        component_type = get_component_type(component_type)
+        if component_type is None or component_type.form_class is None:
+            return jsonify({"html": "<div>Tipo inválido</div>"}), 404
+        response = jsonify({"html": component_type.render_form()})
+        response.set_etag(component_type.form_etag)
+        response.cache_control.public = True
+        response.cache_control.max_age = 3600
+        return response.make_conditional(request)
+
+def register_commands(app):
+    services = app.extensions["esphome"]
+
+    @app.cli.command("validate")
+    @click.argument("device_ids", nargs=-1, type=int)
+    def validate_devices_command(device_ids):
+        """Valida a configuração ESPHome dos dispositivos."""
+        results = services.device_service.validate_devices(device_ids=list(device_ids))
+        invalid = 0
+        for result in results:
+            status = "ok" if result.get("valid") else "inválida"
+            click.echo(f"{result['device_name']}: {status}")
+            if not result.get("valid"):
+                invalid += 1
+                click.echo(result.get("output", ""))
+        services.validation_service.close()
+        if invalid:
+            raise SystemExit(1)
+
+    @app.cli.command("build")
+    @click.argument("device_ids", nargs=-1, type=int)
+    @click.option("--dirty", is_flag=True, help="Compila apenas dispositivos sem firmware atualizado.")
+    @click.option("--report", type=click.Path(dir_okay=False), help="Salva o relatório do lote em JSON.")
+    def build_devices(device_ids, dirty, report):
+        """Compila vários dispositivos em paralelo."""
+        if not device_ids and not dirty:
+            raise click.UsageError("Informe os dispositivos ou use --dirty.")
+        batch_id, jobs = services.build_service.start_batch(device_ids=list(device_ids), dirty_only=dirty)
+        if not jobs:
+            click.echo("Nenhum dispositivo para compilar.")
+            return
+        def on_progress(done, total, entry):
+            click.echo(f"[{done}/{total}] {entry['device_name']}: {entry['status']} ({entry['wall_time']}s)")
+        summary = services.build_service.wait(batch_id, on_progress=on_progress)
+        click.echo(
+            f"Lote {batch_id}: {summary['succeeded']} sucesso(s), {summary['failed']} falha(s), "
+            f"{summary['cancelled']} cancelado(s) em {summary['wall_time']}s"
+        )
+        if report:
+            with open(report, "w") as report_file:
+                json.dump(summary, report_file, indent=2)
+        if summary["failed"] or summary["cancelled"]:
+            raise SystemExit(1)
+
+if __name__ == "__main__":
+    app = create_app()
+    socketio = app.extensions["esphome"].socketio
+    socketio.run(app, host=os.environ.get("HOST", "127.0.0.1"), port=int(os.environ.get("PORT", 5000)))
@@ -0,0 +1,30 @@
+"""add device config hash
+
+Revision ID: 1792300000
+Revises: 1756124744
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1792300000'
+down_revision: Union[str, Sequence[str], None] = '1756124744'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('device', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('config_hash', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('device', schema=None) as batch_op:
+        batch_op.drop_column('config_hash')
@@ -0,0 +1,34 @@
+"""split compile and upload jobs
+
+Revision ID: 1792320000
+Revises: 1792310000
+Create Date: 2026-10-18 14:33:20.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1792320000'
+down_revision: Union[str, Sequence[str], None] = '1792310000'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('job', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('config_hash', sa.String(), nullable=True))
+        batch_op.add_column(sa.Column('depends_on_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('fk_job_depends_on_id_job', 'job', ['depends_on_id'], ['id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('job', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_job_depends_on_id_job', type_='foreignkey')
+        batch_op.drop_column('depends_on_id')
+        batch_op.drop_column('config_hash')
@@ -0,0 +1,32 @@
+"""add job batch id
+
+Revision ID: 1792330000
+Revises: 1792320000
+Create Date: 2026-10-18 17:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1792330000'
+down_revision: Union[str, Sequence[str], None] = '1792320000'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('job', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('batch_id', sa.String(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_job_batch_id'), ['batch_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('job', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_job_batch_id'))
+        batch_op.drop_column('batch_id')
@@ -0,0 +1,40 @@
+"""add secondary indexes
+
+Revision ID: 1792340000
+Revises: 1792330000
+Create Date: 2026-10-18 20:06:40.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1792340000'
+down_revision: Union[str, Sequence[str], None] = '1792330000'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('component', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_component_device_id'), ['device_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_component_component_type'), ['component_type'], unique=False)
+
+    with op.batch_alter_table('device', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_device_platform'), ['platform'], unique=False)
+        batch_op.create_index(batch_op.f('ix_device_board'), ['board'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('device', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_device_board'))
+        batch_op.drop_index(batch_op.f('ix_device_platform'))
+
+    with op.batch_alter_table('component', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_component_component_type'))
+        batch_op.drop_index(batch_op.f('ix_component_device_id'))
@@ -0,0 +1,51 @@
+"""structured component config
+
+Revision ID: 1792350000
+Revises: 1792340000
+Create Date: 2026-10-18 22:53:20.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1792350000'
+down_revision: Union[str, Sequence[str], None] = '1792340000'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('component', schema=None) as batch_op:
+        batch_op.alter_column('config_json',
+               existing_type=sa.String(),
+               type_=sa.JSON(),
+               existing_nullable=False)
+    # normaliza as strings gravadas com json.dumps para o formato do JSON1
+    op.execute("UPDATE component SET config_json = json(config_json)")
+    # SQLite só permite adicionar colunas geradas VIRTUAL via ALTER TABLE
+    op.add_column('component', sa.Column('pin', sa.String(), sa.Computed("coalesce(json_extract(config_json, '$.pin.number'), json_extract(config_json, '$.pin'))"), nullable=True))
+    op.add_column('component', sa.Column('platform', sa.String(), sa.Computed("json_extract(config_json, '$.platform')"), nullable=True))
+    op.add_column('component', sa.Column('name', sa.String(), sa.Computed("json_extract(config_json, '$.name')"), nullable=True))
+    op.create_index(op.f('ix_component_pin'), 'component', ['pin'], unique=False)
+    op.create_index(op.f('ix_component_platform'), 'component', ['platform'], unique=False)
+    op.create_index(op.f('ix_component_name'), 'component', ['name'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_component_name'), table_name='component')
+    op.drop_index(op.f('ix_component_platform'), table_name='component')
+    op.drop_index(op.f('ix_component_pin'), table_name='component')
+    op.drop_column('component', 'name')
+    op.drop_column('component', 'platform')
+    op.drop_column('component', 'pin')
+    with op.batch_alter_table('component', schema=None) as batch_op:
+        batch_op.alter_column('config_json',
+               existing_type=sa.JSON(),
+               type_=sa.String(),
+               existing_nullable=False)
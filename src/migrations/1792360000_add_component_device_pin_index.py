@@ -0,0 +1,28 @@
+"""add component device pin index
+
+Revision ID: 1792360000
+Revises: 1792350000
+Create Date: 2026-10-19 01:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1792360000'
+down_revision: Union[str, Sequence[str], None] = '1792350000'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_component_device_id_pin', 'component', ['device_id', 'pin'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_component_device_id_pin', table_name='component')
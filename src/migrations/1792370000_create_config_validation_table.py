@@ -0,0 +1,35 @@
+"""create config validation table
+
+Revision ID: 1792370000
+Revises: 1792360000
+Create Date: 2026-10-19 04:26:40.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1792370000'
+down_revision: Union[str, Sequence[str], None] = '1792360000'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('config_validation',
+    sa.Column('config_hash', sa.String(), nullable=False),
+    sa.Column('esphome_version', sa.String(), nullable=False),
+    sa.Column('valid', sa.Boolean(), nullable=False),
+    sa.Column('output', sa.String(), nullable=False),
+    sa.Column('validated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('config_hash', 'esphome_version')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('config_validation')
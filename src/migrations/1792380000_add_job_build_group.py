@@ -0,0 +1,34 @@
+"""add job build group
+
+Revision ID: 1792380000
+Revises: 1792370000
+Create Date: 2026-10-19 07:13:20.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1792380000'
+down_revision: Union[str, Sequence[str], None] = '1792370000'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('job', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('build_group', sa.String(), nullable=True))
+        batch_op.add_column(sa.Column('cache_hits', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('cache_misses', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('job', schema=None) as batch_op:
+        batch_op.drop_column('cache_misses')
+        batch_op.drop_column('cache_hits')
+        batch_op.drop_column('build_group')
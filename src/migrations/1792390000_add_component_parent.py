@@ -0,0 +1,53 @@
+"""add component parent
+
+Revision ID: 1792390000
+Revises: 1792380000
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1792390000'
+down_revision: Union[str, Sequence[str], None] = '1792380000'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # sem batch: recriar a tabela quebraria as colunas geradas do config_json. O SQLite não
+    # adiciona a chave estrangeira via ALTER, então a remoção em cascata fica a cargo do ORM
+    op.add_column('component', sa.Column('parent_id', sa.Integer(), nullable=True))
+    op.create_index(op.f('ix_component_parent_id'), 'component', ['parent_id'], unique=False)
+
+    # liga os output/number já existentes ao servo que os usa
+    op.execute("""
+        UPDATE component SET parent_id = (
+            SELECT servo.id FROM component AS servo
+            WHERE servo.component_type = 'servo'
+              AND servo.device_id = component.device_id
+              AND json_extract(servo.config_json, '$.output') = json_extract(component.config_json, '$.id')
+        )
+        WHERE component_type = 'output'
+    """)
+    op.execute("""
+        UPDATE component SET parent_id = (
+            SELECT servo.id FROM component AS servo
+            WHERE servo.component_type = 'servo'
+              AND servo.device_id = component.device_id
+              AND json_extract(servo.config_json, '$.id')
+                = json_extract(component.config_json, '$.set_action.then[0]."servo.write".id')
+        )
+        WHERE component_type = 'number'
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_component_parent_id'), table_name='component')
+    op.drop_column('component', 'parent_id')
@@ -0,0 +1,30 @@
+"""add job owner
+
+Revision ID: 1792410000
+Revises: 1792400000
+Create Date: 2026-10-19 15:33:20.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1792410000'
+down_revision: Union[str, Sequence[str], None] = '1792400000'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('job', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('owner', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('job', schema=None) as batch_op:
+        batch_op.drop_column('owner')
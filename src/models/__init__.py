@@ -1,2 +1,5 @@
 from .component import Component
-from .device import Device
\ No newline at end of file
+from .device import Device
+from .job import Job
+from .validation import ConfigValidation
+from .template import DeviceTemplate
\ No newline at end of file
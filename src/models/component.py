@@ -1,15 +1,39 @@
 from typing import Optional
-from sqlalchemy import ForeignKey
+from sqlalchemy import JSON, Computed, ForeignKey, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from src.database.db import db
 
 
 class Component(db.Model):
     __tablename__ = "component"
+    __table_args__ = (
+        Index("ix_component_device_id_pin", "device_id", "pin"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
-    component_type: Mapped[str]
-    config_json: Mapped[str]
-    device_id: Mapped[int] = mapped_column(ForeignKey("device.id"))
+    component_type: Mapped[str] = mapped_column(index=True)
+    config_json: Mapped[dict] = mapped_column(JSON)
+    device_id: Mapped[int] = mapped_column(ForeignKey("device.id"), index=True)
+    # componentes auxiliares (ex.: output e number de um servo) apontam para o principal
+    parent_id: Mapped[Optional[int]] = mapped_column(
+        ForeignKey("component.id", ondelete="CASCADE"), index=True
+    )
+    # colunas geradas pelo SQLite a partir do config_json
+    pin: Mapped[Optional[str]] = mapped_column(
+        Computed("coalesce(json_extract(config_json, '$.pin.number'), json_extract(config_json, '$.pin'))"),
+        index=True,
+    )
+    platform: Mapped[Optional[str]] = mapped_column(
+        Computed("json_extract(config_json, '$.platform')"), index=True
+    )
+    name: Mapped[Optional[str]] = mapped_column(
+        Computed("json_extract(config_json, '$.name')"), index=True
+    )
 
     device: Mapped["Device"] = relationship(back_populates="components")
+    parent: Mapped[Optional["Component"]] = relationship(
+        back_populates="children", remote_side="Component.id"
+    )
+    children: Mapped[list["Component"]] = relationship(
+        back_populates="parent", cascade="all, delete-orphan"
+    )
@@ -8,13 +8,14 @@ class Device(db.Model):
 
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str] = mapped_column(unique=True)
-    platform: Mapped[str]
-    board: Mapped[str]
+    platform: Mapped[str] = mapped_column(index=True)
+    board: Mapped[str] = mapped_column(index=True)
     wifi_ssid: Mapped[str]
     wifi_password: Mapped[Optional[str]]
     ota_password: Mapped[Optional[str]]
     config_file: Mapped[str] = mapped_column(unique=True)
     ap_ssid: Mapped[str] = mapped_column(unique=True)
     ap_password: Mapped[str]
+    config_hash: Mapped[Optional[str]]
 
     components: Mapped[List["Component"]] = relationship(back_populates="device", cascade="all, delete-orphan")
@@ -0,0 +1,39 @@
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import ForeignKey
+from sqlalchemy.orm import Mapped, mapped_column
+from src.database.db import db
+
+
+class JobStatus:
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+    FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+
+class Job(db.Model):
+    __tablename__ = "job"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    device_id: Mapped[Optional[int]] = mapped_column(ForeignKey("device.id", ondelete="SET NULL"))
+    device_name: Mapped[str]
+    kind: Mapped[str]
+    serial_port: Mapped[Optional[str]]
+    command: Mapped[str]
+    config_hash: Mapped[Optional[str]]
+    depends_on_id: Mapped[Optional[int]] = mapped_column(ForeignKey("job.id"))
+    batch_id: Mapped[Optional[str]] = mapped_column(index=True)
+    build_group: Mapped[Optional[str]]
+    # host:pid do processo que enfileirou o job (servidor ou CLI)
+    owner: Mapped[Optional[str]]
+    cache_hits: Mapped[Optional[int]]
+    cache_misses: Mapped[Optional[int]]
+    status: Mapped[str]
+    return_code: Mapped[Optional[int]]
+    created_at: Mapped[datetime]
+    started_at: Mapped[Optional[datetime]]
+    finished_at: Mapped[Optional[datetime]]
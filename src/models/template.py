@@ -0,0 +1,14 @@
+from sqlalchemy import JSON
+from sqlalchemy.orm import Mapped, mapped_column
+from src.database.db import db
+
+
+class DeviceTemplate(db.Model):
+    __tablename__ = "device_template"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    name: Mapped[str] = mapped_column(unique=True)
+    platform: Mapped[str]
+    board: Mapped[str]
+    # mesmo formato aceito pela API de componentes em lote: component_type, config_json e children
+    components_json: Mapped[list] = mapped_column(JSON)
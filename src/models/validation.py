@@ -0,0 +1,13 @@
+from datetime import datetime
+from sqlalchemy.orm import Mapped, mapped_column
+from src.database.db import db
+
+
+class ConfigValidation(db.Model):
+    __tablename__ = "config_validation"
+
+    config_hash: Mapped[str] = mapped_column(primary_key=True)
+    esphome_version: Mapped[str] = mapped_column(primary_key=True)
+    valid: Mapped[bool]
+    output: Mapped[str]
+    validated_at: Mapped[datetime]
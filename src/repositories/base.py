@@ -6,31 +6,56 @@ class BaseRepository:
     def __init__(self, model):
         self.model = model
 
-    def create(self, data: dict):
+    def create(self, data: dict, commit=True):
         instance = self.model(**data)
         db.session.add(instance)
-        db.session.commit()
+        self._save(commit)
         return instance
 
-    def get(self, instance_id):
+    def get(self, instance_id, options=None):
+        if options:
+            return db.session.get(
+                self.model, instance_id, options=options, populate_existing=True
+            )
         return db.session.get(self.model, instance_id)
 
-    def list_all(self):
-        return db.session.execute(db.select(self.model)).scalars().all()
+    def get_many(self, instance_ids, options=None):
+        query = db.select(self.model).where(self.model.id.in_(instance_ids)).order_by(self.model.id)
+        if options:
+            query = query.options(*options)
+        return db.session.execute(query).scalars().all()
+
+    def list_all(self, options=None):
+        query = db.select(self.model)
+        if options:
+            query = query.options(*options)
+        return db.session.execute(query).scalars().all()
+
+    def paginate(self, limit=50, after_id=None, options=None, filters=None):
+        query = db.select(self.model).order_by(self.model.id).limit(limit + 1)
+        if after_id is not None:
+            query = query.where(self.model.id > after_id)
+        if filters:
+            query = query.where(*filters)
+        if options:
+            query = query.options(*options)
+        instances = db.session.execute(query).scalars().all()
+        next_cursor = instances[limit - 1].id if len(instances) > limit else None
+        return instances[:limit], next_cursor
 
-    def update(self, instance_id, data: dict):
+    def update(self, instance_id, data: dict, commit=True):
         instance = self.get(instance_id)
         if instance:
             for key, value in data.items():
                 setattr(instance, key, value)
-            db.session.commit()
+            self._save(commit)
         return instance
 
-    def delete(self, instance_id):
+    def delete(self, instance_id, commit=True):
         instance = self.get(instance_id)
         if instance:
             db.session.delete(instance)
-            db.session.commit()
+            self._save(commit)
         return instance
 
     def filter_by(self, data: dict):
@@ -43,10 +68,24 @@ class BaseRepository:
             db.select(self.model).filter_by(**data)
         ).scalar_one_or_none()
     
-    def create_all(self, data_list: list[dict]):
+    def create_all(self, data_list: list[dict], commit=True):
         instances = []
         for data in data_list:
             instances.append(self.model(**data))
         db.session.add_all(instances)
-        db.session.commit()
+        self._save(commit)
         return instances
+
+    def commit(self):
+        db.session.commit()
+
+    def rollback(self):
+        db.session.rollback()
+
+    def _save(self, commit):
+        # com commit=False as alterações só são enviadas ao banco (ids preenchidos) e
+        # o commit fica para quem agrupou as operações
+        if commit:
+            db.session.commit()
+        else:
+            db.session.flush()
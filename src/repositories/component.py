@@ -1,3 +1,4 @@
+from src.database.db import db
 from src.models.component import Component
 from src.repositories.base import BaseRepository
 
@@ -5,3 +6,38 @@ from src.repositories.base import BaseRepository
 class ComponentRepository(BaseRepository):
     def __init__(self):
         super().__init__(Component)
+
+    def find_pin_owner(self, device_id, pin, exclude_ids=None):
+        query = db.select(Component).where(Component.device_id == device_id, Component.pin == pin)
+        if exclude_ids:
+            query = query.where(Component.id.not_in(exclude_ids))
+        return db.session.execute(query.limit(1)).scalar_one_or_none()
+
+    def pin_usage(self):
+        return db.session.execute(
+            db.select(
+                Component.pin,
+                db.func.count(db.distinct(Component.device_id)),
+                db.func.count(Component.id),
+            )
+            .where(Component.pin.is_not(None))
+            .group_by(Component.pin)
+            .order_by(Component.pin)
+        ).all()
+
+    def pin_conflicts(self, device_id=None):
+        query = (
+            db.select(Component.device_id, Component.pin, db.func.count(Component.id))
+            .where(Component.pin.is_not(None))
+            .group_by(Component.device_id, Component.pin)
+            .having(db.func.count(Component.id) > 1)
+            .order_by(Component.device_id, Component.pin)
+        )
+        if device_id is not None:
+            query = query.where(Component.device_id == device_id)
+        return db.session.execute(query).all()
+
+    def list_by_device(self, device_id):
+        return db.session.execute(
+            db.select(Component).where(Component.device_id == device_id).order_by(Component.id)
+        ).scalars().all()
@@ -1,3 +1,6 @@
+from sqlalchemy.orm import lazyload, selectinload
+from src.database.db import db
+from src.models.component import Component
 from src.models.device import Device
 from src.repositories.base import BaseRepository
 
@@ -5,3 +8,45 @@ from src.repositories.base import BaseRepository
 class DeviceRepository(BaseRepository):
     def __init__(self):
         super().__init__(Device)
+
+    def get_with_components(self, device_id):
+        return self.get(device_id, options=[selectinload(Device.components)])
+
+    def list_with_components(self, device_ids=None):
+        options = [selectinload(Device.components)]
+        if device_ids:
+            return self.get_many(device_ids, options=options)
+        return self.list_all(options=options)
+
+    def release_components(self, device_ids):
+        # o selectinload fica guardado no estado do objeto: depois de um commit, cada acesso a um
+        # dispositivo recarregaria também os componentes; recarrega todos de uma vez sem eles
+        db.session.execute(
+            db.select(Device)
+            .where(Device.id.in_(device_ids))
+            .options(lazyload(Device.components))
+            .execution_options(populate_existing=True)
+        ).scalars().all()
+
+    def list_with_component_counts(self, limit=100, after_id=None):
+        query = (
+            db.select(Device, db.func.count(Component.id))
+            .outerjoin(Component, Component.device_id == Device.id)
+            .group_by(Device.id)
+            .order_by(Device.id)
+            .limit(limit + 1)
+        )
+        if after_id is not None:
+            query = query.where(Device.id > after_id)
+        rows = db.session.execute(query).all()
+        next_cursor = rows[limit - 1][0].id if len(rows) > limit else None
+        return [tuple(row) for row in rows[:limit]], next_cursor
+
+    def find_conflicts(self, names, config_files, ap_ssids):
+        return db.session.execute(
+            db.select(Device).where(
+                Device.name.in_(names)
+                | Device.config_file.in_(config_files)
+                | Device.ap_ssid.in_(ap_ssids)
+            )
+        ).scalars().all()
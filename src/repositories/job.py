@@ -0,0 +1,56 @@
+from src.database.db import db
+from src.models.job import Job, JobStatus
+from src.repositories.base import BaseRepository
+
+
+class JobRepository(BaseRepository):
+    def __init__(self):
+        super().__init__(Job)
+
+    def list_recent(self, limit=50, device_id=None):
+        query = db.select(Job).order_by(Job.id.desc()).limit(limit)
+        if device_id is not None:
+            query = query.where(Job.device_id == device_id)
+        return db.session.execute(query).scalars().all()
+
+    def list_by_status(self, statuses):
+        return db.session.execute(
+            db.select(Job).where(Job.status.in_(statuses)).order_by(Job.id)
+        ).scalars().all()
+
+    def list_by_batch(self, batch_id):
+        return db.session.execute(
+            db.select(Job)
+            .where(Job.batch_id == batch_id)
+            .order_by(Job.id)
+            .execution_options(populate_existing=True)
+        ).scalars().all()
+
+    def count_by_batch(self, batch_id):
+        return db.session.execute(
+            db.select(
+                db.func.count(Job.id),
+                db.func.count(Job.id).filter(Job.status.in_(JobStatus.FINISHED)),
+            ).where(Job.batch_id == batch_id)
+        ).one()
+
+    def build_group_stats(self):
+        return db.session.execute(
+            db.select(
+                Job.build_group,
+                db.func.count(Job.id),
+                db.func.sum(Job.cache_hits),
+                db.func.sum(Job.cache_misses),
+            )
+            .where(Job.build_group.is_not(None), Job.status == JobStatus.SUCCEEDED)
+            .group_by(Job.build_group)
+            .order_by(Job.build_group)
+        ).all()
+
+    def last_upload_by_port(self):
+        latest = (
+            db.select(db.func.max(Job.id))
+            .where(Job.kind == "upload", Job.status == JobStatus.SUCCEEDED)
+            .group_by(Job.serial_port)
+        )
+        return db.session.execute(db.select(Job).where(Job.id.in_(latest))).scalars().all()
@@ -0,0 +1,7 @@
+from src.models.template import DeviceTemplate
+from src.repositories.base import BaseRepository
+
+
+class DeviceTemplateRepository(BaseRepository):
+    def __init__(self):
+        super().__init__(DeviceTemplate)
@@ -0,0 +1,19 @@
+from src.database.db import db
+from src.models.validation import ConfigValidation
+from src.repositories.base import BaseRepository
+
+
+class ConfigValidationRepository(BaseRepository):
+    def __init__(self):
+        super().__init__(ConfigValidation)
+
+    def get_result(self, config_hash, esphome_version):
+        return db.session.get(ConfigValidation, (config_hash, esphome_version))
+
+    def get_results(self, config_hashes, esphome_version):
+        return db.session.execute(
+            db.select(ConfigValidation).where(
+                ConfigValidation.config_hash.in_(config_hashes),
+                ConfigValidation.esphome_version == esphome_version,
+            )
+        ).scalars().all()
@@ -0,0 +1,56 @@
+import subprocess
+import threading
+import time
+
+
+class ThreadingRuntime:
+    def __init__(self):
+        self.subprocess = subprocess
+        self.cooperative = False
+
+    def condition(self):
+        return threading.Condition()
+
+    def spawn(self, target, name=None):
+        thread = threading.Thread(target=target, name=name, daemon=True)
+        thread.start()
+        return thread
+
+    def call_later(self, seconds, function, *args):
+        timer = threading.Timer(seconds, function, args=args)
+        timer.daemon = True
+        timer.start()
+        return timer
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+
+class EventletRuntime:
+    # primitivas cooperativas: leituras de pipe e esperas devolvem o controle ao hub
+    def __init__(self):
+        import eventlet
+        from eventlet.green import subprocess as green_subprocess
+        from eventlet.green import threading as green_threading
+        self.eventlet = eventlet
+        self.subprocess = green_subprocess
+        self.threading = green_threading
+        self.cooperative = True
+
+    def condition(self):
+        return self.threading.Condition()
+
+    def spawn(self, target, name=None):
+        return self.eventlet.spawn(target)
+
+    def call_later(self, seconds, function, *args):
+        return self.eventlet.spawn_after(seconds, function, *args)
+
+    def sleep(self, seconds):
+        self.eventlet.sleep(seconds)
+
+
+def runtime_for(async_mode):
+    if async_mode == "eventlet":
+        return EventletRuntime()
+    return ThreadingRuntime()
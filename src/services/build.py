@@ -0,0 +1,100 @@
+from uuid import uuid4
+from src.models.job import JobStatus
+from src.repositories.device import DeviceRepository
+from src.repositories.job import JobRepository
+from src.services.device import DeviceService
+from src.services.job import JobService
+
+
+class BuildService:
+    def __init__(
+        self,
+        device_repository: DeviceRepository,
+        job_repository: JobRepository,
+        device_service: DeviceService,
+        job_service: JobService,
+    ):
+        self.device_repository = device_repository
+        self.job_repository = job_repository
+        self.device_service = device_service
+        self.job_service = job_service
+
+    def start_batch(self, device_ids=None, dirty_only=False):
+        self.device_service.flush_configs(device_ids)
+        devices = self.device_repository.list_with_components(device_ids)
+        self.device_service.sync_device_configs(devices)
+        batch_id = uuid4().hex
+        jobs = []
+        for device in devices:
+            if dirty_only and self.job_service.has_firmware(device):
+                continue
+            jobs.append(self.job_service.submit_compile(device, batch_id=batch_id))
+        print(f"lote {batch_id}: {len(jobs)} dispositivo(s) para compilar")
+        return batch_id, jobs
+
+    def start_ota(self, device_ids, hosts=None):
+        hosts = hosts or {}
+        self.device_service.flush_configs(device_ids)
+        devices = self.device_repository.list_with_components(device_ids)
+        self.device_service.sync_device_configs(devices)
+        batch_id = uuid4().hex
+        jobs = []
+        for device in devices:
+            host = hosts.get(str(device.id)) or hosts.get(device.id)
+            jobs.append(self.job_service.submit_ota(device, host, batch_id=batch_id))
+        print(f"lote {batch_id}: {len(jobs)} dispositivo(s) para atualizar via OTA")
+        return batch_id, jobs
+
+    def progress(self, batch_id):
+        total, finished = self.job_repository.count_by_batch(batch_id)
+        return {"batch_id": batch_id, "total": total, "finished": finished}
+
+    def summarize(self, batch_id):
+        jobs = self.job_repository.list_by_batch(batch_id)
+        devices = []
+        for job in jobs:
+            devices.append({
+                "device_id": job.device_id,
+                "device_name": job.device_name,
+                "job_id": job.id,
+                "kind": job.kind,
+                "status": job.status,
+                "queued_time": self._seconds(job.created_at, job.started_at),
+                "wall_time": self._seconds(job.started_at, job.finished_at),
+            })
+        finished = [job for job in jobs if job.status in JobStatus.FINISHED]
+        wall_time = None
+        if jobs and len(finished) == len(jobs):
+            wall_time = self._seconds(
+                min(job.created_at for job in jobs),
+                max(job.finished_at for job in jobs),
+            )
+        return {
+            "batch_id": batch_id,
+            "total": len(jobs),
+            "finished": len(finished),
+            "succeeded": sum(1 for job in jobs if job.status == JobStatus.SUCCEEDED),
+            "failed": sum(1 for job in jobs if job.status == JobStatus.FAILED),
+            "cancelled": sum(1 for job in jobs if job.status == JobStatus.CANCELLED),
+            "wall_time": wall_time,
+            "devices": devices,
+        }
+
+    def wait(self, batch_id, on_progress=None, poll_interval=0.5):
+        reported = set()
+        while True:
+            summary = self.summarize(batch_id)
+            for entry in summary["devices"]:
+                if entry["status"] in JobStatus.FINISHED and entry["job_id"] not in reported:
+                    reported.add(entry["job_id"])
+                    if on_progress is not None:
+                        on_progress(len(reported), summary["total"], entry)
+            if summary["finished"] == summary["total"]:
+                return summary
+            # sleep cooperativo: com eventlet os jobs rodam no mesmo hub
+            self.job_service.sleep(poll_interval)
+
+    def _seconds(self, start, end):
+        if start is None or end is None:
+            return None
+        return round((end - start).total_seconds(), 3)
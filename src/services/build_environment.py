@@ -0,0 +1,54 @@
+import os
+import re
+from src.config import Config
+from src.repositories.job import JobRepository
+from src.utils import esphome_version
+
+
+CACHE_HIT = re.compile(r"^Retrieved `.*' from cache", re.MULTILINE)
+CACHE_MISS = re.compile(r"^Compiling \S+\.o\b", re.MULTILINE)
+
+
+class BuildEnvironmentManager:
+    def __init__(self, job_repository: JobRepository):
+        self.job_repository = job_repository
+        self.config = Config()
+
+    def group(self, device):
+        return "/".join((device.platform, device.board, esphome_version()))
+
+    def cache_dir(self, group):
+        return os.path.join(self.config.build_cache_dir, re.sub(r"[^A-Za-z0-9._-]", "_", group))
+
+    def environment(self, group):
+        # o PlatformIO reaproveita objetos compilados com as mesmas flags entre projetos
+        cache_dir = os.path.abspath(self.cache_dir(group))
+        os.makedirs(cache_dir, exist_ok=True)
+        environment = {"PLATFORMIO_BUILD_CACHE_DIR": cache_dir}
+        if self.config.platformio_core_dir:
+            environment["PLATFORMIO_CORE_DIR"] = os.path.abspath(self.config.platformio_core_dir)
+        return environment
+
+    def count_cache(self, output):
+        return (
+            sum(1 for _ in CACHE_HIT.finditer(output)),
+            sum(1 for _ in CACHE_MISS.finditer(output)),
+        )
+
+    def report(self):
+        groups = []
+        for group, builds, hits, misses in self.job_repository.build_group_stats():
+            platform, board, version = group.split("/", 2)
+            hits = hits or 0
+            misses = misses or 0
+            groups.append({
+                "group": group,
+                "platform": platform,
+                "board": board,
+                "esphome_version": version,
+                "builds": builds,
+                "cache_hits": hits,
+                "cache_misses": misses,
+                "hit_rate": round(hits / (hits + misses), 3) if hits + misses else None,
+            })
+        return groups
@@ -1,8 +1,11 @@
-import json
-from flask import Request, redirect, url_for
+from flask import Request, flash, jsonify, redirect, url_for
+from sqlalchemy.orm import load_only
+from src.component_types import get_component_type
+from src.models.component import Component
 from src.repositories.component import ComponentRepository
 from src.repositories.device import DeviceRepository
 from src.services.device import DeviceService
+from src.utils import is_id, parse_page_args
 
 
 class ComponentService:
@@ -15,6 +18,9 @@ class ComponentService:
         self.component_repository = component_repository
         self.device_repository = device_repository
         self.device_service = device_service
+        self.api_fields = (
+            "id", "device_id", "parent_id", "component_type", "pin", "platform", "name", "config_json",
+        )
 
 
     def create_component(self, device_id, request: Request):
@@ -25,117 +31,32 @@ class ComponentService:
         print(f"adicionar componente no dispositivo #{device_id}")
         component_dict = request.form
         print(component_dict)
-        component_type = component_dict.get("componentType")
-        match component_type:
-            case "servo":
-                servo_component_data = {
-                    "component_type": component_type,
-                    "config_json": json.dumps({
-                        "id": component_dict.get("servo_id"),
-                        "output": component_dict.get("output_id"),
-                    }),
-                    "device_id": device_id,
-                }
-                output_component_data = {
-                    "component_type": "output",
-                    "config_json": json.dumps({
-                        "platform": component_dict.get("platform"),
-                        "id": component_dict.get("output_id"),
-                        "pin": component_dict.get("pin"),
-                        "frequency": f'{component_dict.get("frequency")} Hz',
-                    }),
-                    "device_id": device_id,
-                }
-                number_component_data = {
-                    "component_type": "number",
-                    "config_json": json.dumps({
-                        "platform": "template",
-                        "name": component_dict.get("name"),
-                        "min_value": component_dict.get("min_value", type=int),
-                        "initial_value": component_dict.get("initial_value", type=int),
-                        "max_value": component_dict.get("max_value", type=int),
-                        "step": component_dict.get("step", type=int),
-                        "optimistic": True,
-                        "set_action": {
-                            "then": [
-                                {
-                                    "servo.write": {
-                                        "id": component_dict.get("servo_id"),
-                                        "level": f"!lambda return x / {float(component_dict.get('max_value'))};"
-                                    },
-                                },
-                            ]
-                        },
-                    }),
-                    "device_id": device_id,
-                }
-                self.component_repository.create_all([
-                    servo_component_data,
-                    output_component_data,
-                    number_component_data,
-                ])
-            case "switch":
-                switch_component_data = {
-                    "component_type": component_type,
-                    "config_json": json.dumps({
-                        "platform": component_dict.get("platform"),
-                        "name": component_dict.get("name"),
-                        "pin": {
-                            "number": component_dict.get("pin"),
-                            "inverted": True if component_dict.get("inverted") == "y" else False,
-                        }
-                    }),
-                    "device_id": device_id,
-                }
-                self.component_repository.create(switch_component_data)
-            case "sensor":
-                sensor_component_data = {
-                    "component_type": component_type,
-                    "config_json": json.dumps({
-                        "platform": component_dict.get("platform"),
-                        "pin": component_dict.get("pin"),
-                        "model": component_dict.get("model"),
-                        "temperature": {
-                            "name": component_dict.get("temperature_name")
-                        },
-                        "humidity": {
-                            "name": component_dict.get("humidity_name")
-                        },
-                        "update_interval": f'{component_dict.get("update_interval")}s',
-                    }),
-                    "device_id": device_id,
-                }
-                self.component_repository.create(sensor_component_data)
-            case "binary_sensor":
-                binary_sensor_component_data = {
-                    "component_type": component_type,
-                    "config_json": json.dumps({
-                        "platform": component_dict.get("platform"),
-                        "name": component_dict.get("name"),
-                        "pin": {
-                            "number": component_dict.get("pin"),
-                            "inverted": True if component_dict.get("inverted") == "y" else False,
-                        },
-                        **({"device_class": component_dict.get("device_class")} if component_dict.get("device_class") else {}),
-                    }),
-                    "device_id": device_id,
-                }
-                self.component_repository.create(binary_sensor_component_data)
+        component_type = get_component_type(component_dict.get("componentType"))
+        if component_type is None or component_type.serializer is None:
+            print("tipo de componente inválido")
+            return redirect(url_for("edit_device", device_id=device_id))
+        if not self.check_pin_available(device_id, component_dict.get("pin")):
+            return redirect(url_for("edit_device", device_id=device_id))
+        configs = component_type.serialize(component_dict)
+        component = self.component_repository.create({
+            "component_type": component_type.name,
+            "config_json": configs.pop(component_type.name),
+            "device_id": device_id,
+        }, commit=False)
+        self.component_repository.create_all([
+            {"component_type": child_type, "config_json": config_json, "device_id": device_id, "parent_id": component.id}
+            for child_type, config_json in configs.items()
+        ])
         print("atualizando arquivo de configuração...")
-        self.device_service.update_device_config(
-            config_file=device.config_file, device_instance=device
-        )
+        self.device_service.mark_config_dirty(device_id)
         return redirect(url_for("edit_device", device_id=device_id))
     
 
     def delete_component(self, device_id, component_id):
         component = self.component_repository.delete(component_id)
         if component:
-            device = self.device_repository.get(device_id)
             print("atualizando arquivo de configuração...")
-            self.device_service.update_device_config(
-                config_file=device.config_file, device_instance=device
-            )
+            self.device_service.mark_config_dirty(device_id)
         return redirect(url_for("edit_device", device_id=device_id))
     
 
@@ -143,52 +64,168 @@ class ComponentService:
         component = self.component_repository.get(component_id)
         if component:
             form_data = request.form
-            component_type = form_data.get("componentType")
-            match component_type:
-                case "sensor":
-                    data = {
-                        "config_json": json.dumps({
-                            "platform": form_data.get("platform"),
-                            "pin": form_data.get("pin"),
-                            "model": form_data.get("model"),
-                            "temperature": {
-                                "name": form_data.get("temperature_name")
-                            },
-                            "humidity": {
-                                "name": form_data.get("humidity_name")
-                            },
-                            "update_interval": f'{form_data.get("update_interval")}s',
-                        })
-                    }
-                    self.component_repository.update(component_id, data)
-                case "switch":
-                    data = {
-                        "config_json": json.dumps({
-                            "platform": form_data.get("platform"),
-                            "name": form_data.get("name"),
-                            "pin": {
-                                "number": form_data.get("pin"),
-                                "inverted": True if form_data.get("inverted") == "y" else False,
-                            }
-                        })
-                    }
-                    self.component_repository.update(component_id, data)
-                case "binary_sensor":
-                    data = {
-                        "config_json": json.dumps({
-                            "platform": form_data.get("platform"),
-                            "name": form_data.get("name"),
-                            "pin": {
-                                "number": form_data.get("pin"),
-                                "inverted": True if form_data.get("inverted") == "y" else False,
-                            },
-                            **({"device_class": form_data.get("device_class")} if form_data.get("device_class") else {}),
-                        })
-                    }
-                    self.component_repository.update(component_id, data)
-            device = self.device_repository.get(device_id)
+            component_type = get_component_type(component.component_type)
+            if component_type is None or component_type.serializer is None:
+                print("tipo de componente inválido")
+                return redirect(url_for("edit_device", device_id=device_id))
+            # o pino de um servo fica no output ligado a ele
+            exclude_ids = [component_id, *(child.id for child in component.children)]
+            if not self.check_pin_available(device_id, form_data.get("pin"), exclude_ids=exclude_ids):
+                return redirect(url_for("edit_device", device_id=device_id))
+            configs = component_type.serialize(form_data)
+            self.component_repository.update(component_id, {"config_json": configs.pop(component_type.name)}, commit=False)
+            for child in component.children:
+                if child.component_type in configs:
+                    self.component_repository.update(child.id, {"config_json": configs[child.component_type]}, commit=False)
+            self.component_repository.commit()
             print("atualizando arquivo de configuração...")
-            self.device_service.update_device_config(
-                config_file=device.config_file, device_instance=device
-            )
+            self.device_service.mark_config_dirty(device_id)
         return redirect(url_for("edit_device", device_id=device_id))
+    
+
+    def check_pin_available(self, device_id, pin, exclude_ids=None):
+        if not pin:
+            return True
+        owner = self.component_repository.find_pin_owner(device_id, pin, exclude_ids=exclude_ids)
+        if owner is None:
+            return True
+        print(f"o pino {pin} já está em uso pelo componente #{owner.id}")
+        flash(f"O pino {pin} já está em uso por outro componente ({owner.component_type}).", "danger")
+        return False
+    
+
+    def pin_usage_report(self, conflicts_only=False):
+        if conflicts_only:
+            return jsonify([
+                {"device_id": device_id, "pin": pin, "components": components}
+                for device_id, pin, components in self.component_repository.pin_conflicts()
+            ])
+        return jsonify([
+            {"pin": pin, "devices": devices, "components": components}
+            for pin, devices, components in self.component_repository.pin_usage()
+        ])
+    
+
+    def list_components_api(self, device_id, args):
+        if self.device_repository.get(device_id) is None:
+            return jsonify({"error": "Dispositivo não encontrado"}), 404
+        limit, after_id, fields = parse_page_args(args, self.api_fields)
+        filters = [Component.device_id == device_id]
+        if args.get("component_type"):
+            filters.append(Component.component_type == args.get("component_type"))
+        components, next_cursor = self.component_repository.paginate(
+            limit=limit,
+            after_id=after_id,
+            filters=filters,
+            options=[load_only(*[getattr(Component, field) for field in fields])],
+        )
+        return jsonify({
+            "items": [{field: getattr(component, field) for field in fields} for component in components],
+            "next_cursor": next_cursor,
+        })
+
+    def apply_components(self, device_id, data, replace=False):
+        if self.device_repository.get(device_id) is None:
+            return jsonify({"error": "Dispositivo não encontrado"}), 404
+        if not isinstance(data, dict):
+            return jsonify({"errors": ["o corpo da requisição deve ser um objeto JSON"]}), 400
+        if replace:
+            # substitui todos os componentes: exige a lista explícita (pode ser vazia)
+            if not isinstance(data.get("components"), list):
+                return jsonify({"errors": ["components deve ser uma lista"]}), 400
+            data = {"create": data["components"]}
+        creates = data.get("create") or []
+        updates = data.get("update") or []
+        deletes = data.get("delete") or []
+        errors = [
+            f"{field} deve ser uma lista"
+            for field, value in (("create", creates), ("update", updates), ("delete", deletes))
+            if not isinstance(value, list)
+        ]
+        if errors:
+            return jsonify({"errors": errors}), 400
+        existing = {component.id: component for component in self.component_repository.list_by_device(device_id)}
+        errors = self.validate_component_items(creates)
+        for item in updates:
+            if not isinstance(item, dict):
+                errors.append("cada item de update deve ser um objeto")
+            elif not is_id(item.get("id")) or item["id"] not in existing:
+                errors.append(f"componente #{item.get('id')} não pertence ao dispositivo")
+            elif not isinstance(item.get("config_json"), dict) or not item["config_json"]:
+                errors.append(f"config_json do componente #{item['id']} deve ser um objeto não vazio")
+        for component_id in deletes:
+            if not is_id(component_id) or component_id not in existing:
+                errors.append(f"componente #{component_id} não pertence ao dispositivo")
+        if errors:
+            return jsonify({"errors": errors}), 400
+        # tudo em uma transação: um commit e uma geração do arquivo de configuração
+        try:
+            if replace:
+                deletes = [component.id for component in existing.values() if component.parent_id is None]
+            for component_id in deletes:
+                self.component_repository.delete(component_id, commit=False)
+            for item in updates:
+                self.component_repository.update(item["id"], {"config_json": item["config_json"]}, commit=False)
+            for item in creates:
+                self.create_component_item(device_id, item)
+            conflicts = self.component_repository.pin_conflicts(device_id=device_id)
+            if conflicts:
+                self.component_repository.rollback()
+                return jsonify({
+                    "errors": [f"o pino {pin} seria usado por {count} componentes" for _, pin, count in conflicts],
+                }), 409
+            self.component_repository.commit()
+        except Exception:
+            self.component_repository.rollback()
+            raise
+        print(f"{len(creates)} criado(s), {len(updates)} atualizado(s), {len(deletes)} removido(s) no dispositivo #{device_id}")
+        self.device_service.mark_config_dirty(device_id)
+        return jsonify({
+            "items": [
+                {field: getattr(component, field) for field in self.api_fields}
+                for component in self.component_repository.list_by_device(device_id)
+            ],
+        })
+
+    def validate_component_items(self, items):
+        if not isinstance(items, list):
+            return ["a lista de componentes deve ser uma lista"]
+        errors = []
+        for item in items:
+            if not isinstance(item, dict):
+                errors.append("cada componente deve ser um objeto")
+                continue
+            if get_component_type(item.get("component_type")) is None:
+                errors.append(f"tipo de componente inválido: {item.get('component_type')}")
+            if not isinstance(item.get("config_json"), dict):
+                errors.append("config_json deve ser um objeto")
+            errors.extend(self.validate_component_items(item.get("children") or []))
+        return errors
+
+    def item_pin_conflicts(self, items):
+        # mesma regra da coluna calculada Component.pin, aplicada à árvore em JSON
+        counts = {}
+
+        def visit(item):
+            pin = item["config_json"].get("pin")
+            if isinstance(pin, dict):
+                pin = pin.get("number")
+            if pin is not None:
+                counts[str(pin)] = counts.get(str(pin), 0) + 1
+            for child in item.get("children") or []:
+                visit(child)
+
+        for item in items:
+            visit(item)
+        return [f"o pino {pin} seria usado por {count} componentes" for pin, count in counts.items() if count > 1]
+
+    def create_component_item(self, device_id, item, parent_id=None):
+        component = self.component_repository.create({
+            "component_type": item["component_type"],
+            "config_json": item["config_json"],
+            "device_id": device_id,
+            "parent_id": parent_id,
+        }, commit=False)
+        for child in item.get("children") or []:
+            self.create_component_item(device_id, child, parent_id=component.id)
+        return component
@@ -1,22 +1,48 @@
+import atexit
 import os
-import json
+from concurrent.futures import ProcessPoolExecutor
 from string import Template
-from flask import Request, redirect, render_template, url_for
+from flask import Request, jsonify, redirect, render_template, url_for
+from sqlalchemy.orm import load_only
+from src.component_types import form_component_types, get_component_type, yaml_sections
+from src.models.component import Component
+from src.models.device import Device
 from src.repositories.device import DeviceRepository
 from src.repositories.component import ComponentRepository
+from src.services.validation import ValidationService
 from src.config import Config
-from src.utils import generate_password, dict_to_yaml
+from src.runtime import ThreadingRuntime
+from src.utils import generate_password, dict_to_yaml, hash_config, hash_config_file, parse_page_args, write_file_atomic
+
+
+def render_config(template, values, sections):
+    parts = [Template(template).substitute(**values).strip() + "\n"]
+    for component_type, configs in sections.items():
+        if len(configs) > 0:
+            parts.append("\n" + dict_to_yaml({component_type: configs}))
+    return "".join(parts)
 
 
 class DeviceService:
     def __init__(
         self,
         device_repository: DeviceRepository,
-        component_repository: ComponentRepository
+        component_repository: ComponentRepository,
+        validation_service: ValidationService = None,
     ):
         self.device_repository = device_repository
         self.component_repository = component_repository
+        self.validation_service = validation_service
         self.config = Config()
+        self.app = None
+        self.runtime = ThreadingRuntime()
+        self._config_condition = self.runtime.condition()
+        # dispositivo -> arquivo antigo (para renomeações) aguardando a geração do YAML
+        self._dirty_configs = {}
+        self._requested_renders = {}
+        self._completed_renders = {}
+        self._config_worker = None
+        self._flush_at_exit = False
         self.device_config_template = """
 esphome:
   name: $name
@@ -46,99 +72,214 @@ wifi:
 
 captive_portal:
 """
+        # campos expostos pela API (sem senhas)
+        self.api_fields = (
+            "id", "name", "platform", "board", "wifi_ssid", "config_file", "ap_ssid", "config_hash",
+        )
+        # "dirty" lê o arquivo de cada dispositivo: só com ?fields=...,dirty
+        self.optional_api_fields = ("dirty",)
+        # ordem das seções no arquivo YAML gerado
+        self.component_sections = yaml_sections()
+
+    def render_device_config(self, device_instance):
+        return render_config(
+            self.device_config_template,
+            self.config_values(device_instance),
+            self.component_configs(device_instance),
+        )
+
+    def config_values(self, device_instance):
+        return {
+            "name": device_instance.name,
+            "platform": device_instance.platform,
+            "board": device_instance.board,
+            "wifi_ssid": device_instance.wifi_ssid,
+            "wifi_password": device_instance.wifi_password,
+            "ota_password": "" if device_instance.ota_password is None else device_instance.ota_password,
+            "ap_ssid": device_instance.ap_ssid,
+            "ap_password": device_instance.ap_password,
+        }
+
+    def component_configs(self, device_instance):
+        sections = {component_type: [] for component_type in self.component_sections}
+        for component in device_instance.components:
+            component_type = get_component_type(component.component_type)
+            if component_type is not None:
+                sections[component_type.section].append(component.config_json)
+        return sections
+
+    def render_device_configs(self, devices):
+        jobs = [
+            (self.device_config_template, self.config_values(device), self.component_configs(device))
+            for device in devices
+        ]
+        workers = min(self.config.render_workers, len(jobs))
+        # cada dispositivo leva menos de 1 ms; abaixo disso subir o pool custa mais do que economiza
+        if workers > 1 and len(jobs) >= self.config.render_pool_min_devices:
+            # a geração do YAML usa CPU; processos contornam o GIL
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                return list(pool.map(render_config, *zip(*jobs), chunksize=max(1, len(jobs) // (workers * 4))))
+        return [render_config(*job) for job in jobs]
+
+    def sync_device_configs(self, devices):
+        # update_device_config para vários dispositivos (com os componentes já carregados):
+        # só grava os arquivos que mudaram e atualiza os config_hash em um único commit
+        device_ids = [device.id for device in devices]
+        changed = []
+        for device, content in zip(devices, self.render_device_configs(devices)):
+            config_hash = hash_config(content)
+            # confere o conteúdo do disco: um arquivo editado fora da aplicação é regravado
+            if device.config_hash == config_hash and hash_config_file(device.config_file) == config_hash:
+                continue
+            write_file_atomic(device.config_file, content)
+            self.device_repository.update(device.id, {"config_hash": config_hash}, commit=False)
+            changed.append(device)
+        if changed:
+            self.device_repository.commit()
+        self.device_repository.release_components(device_ids)
+        print(f"{len(changed)} de {len(devices)} arquivo(s) de configuração atualizados")
+        if self.validation_service is not None:
+            for device in changed:
+                self.validation_service.submit(device.config_hash, device.config_file)
+        return changed
+
+    def init_app(self, app, runtime=None):
+        self.app = app
+        if runtime is not None:
+            self.runtime = runtime
+            self._config_condition = runtime.condition()
+        # não perde escritas pendentes quando o processo termina (ex.: comandos da CLI)
+        if not self._flush_at_exit:
+            atexit.register(self.flush_configs)
+            self._flush_at_exit = True
+
+    def mark_config_dirty(self, device_id, old_config_file=None):
+        with self._config_condition:
+            if self._dirty_configs.get(device_id) is None:
+                self._dirty_configs[device_id] = old_config_file
+            self._requested_renders[device_id] = self._requested_renders.get(device_id, 0) + 1
+            if self._config_worker is None:
+                self._config_worker = self.runtime.spawn(self._config_worker_loop, name="config-writer")
+            self._config_condition.notify_all()
+
+    def flush_configs(self, device_ids=None):
+        # barreira: espera até que todas as alterações marcadas até aqui estejam no disco
+        with self._config_condition:
+            targets = {
+                device_id: requested
+                for device_id, requested in self._requested_renders.items()
+                if device_ids is None or device_id in device_ids
+            }
+            while any(
+                self._completed_renders.get(device_id, 0) < requested
+                for device_id, requested in targets.items()
+            ):
+                self._config_condition.wait()
+
+    def _config_worker_loop(self):
+        try:
+            while True:
+                with self._config_condition:
+                    while not self._dirty_configs:
+                        self._config_condition.wait()
+                targets = {}
+                try:
+                    # agrupa edições seguidas do mesmo dispositivo em uma única escrita
+                    self.runtime.sleep(self.config.config_write_delay)
+                    with self._config_condition:
+                        batch = self._dirty_configs
+                        self._dirty_configs = {}
+                        targets = {device_id: self._requested_renders[device_id] for device_id in batch}
+                    with self.app.app_context():
+                        for device_id, old_config_file in batch.items():
+                            try:
+                                device = self.device_repository.get_with_components(device_id)
+                                if device is not None:
+                                    self.update_device_config(
+                                        config_file=old_config_file or device.config_file,
+                                        device_instance=device,
+                                    )
+                            except Exception as error:
+                                print(f"erro ao gerar o arquivo de configuração do dispositivo {device_id}: {error}")
+                            with self._config_condition:
+                                self._completed_renders[device_id] = targets[device_id]
+                                self._config_condition.notify_all()
+                except Exception as error:
+                    print(f"erro ao gerar os arquivos de configuração pendentes: {error}")
+                finally:
+                    # o flush_configs não pode ficar esperando por um lote que falhou no meio
+                    with self._config_condition:
+                        for device_id, requested in targets.items():
+                            if self._completed_renders.get(device_id, 0) < requested:
+                                self._completed_renders[device_id] = requested
+                        self._config_condition.notify_all()
+        finally:
+            # se o worker morrer, o próximo mark_config_dirty (ou as alterações já pendentes) cria outro
+            with self._config_condition:
+                self._config_worker = None
+                if self._dirty_configs:
+                    self._config_worker = self.runtime.spawn(self._config_worker_loop, name="config-writer")
+
+    def pending_config_ids(self, device_ids):
+        # só memória: alterações marcadas que o worker ainda não gravou
+        with self._config_condition:
+            return {
+                device_id
+                for device_id in device_ids
+                if self._completed_renders.get(device_id, 0) < self._requested_renders.get(device_id, 0)
+            }
+
+    def is_config_dirty(self, device_instance):
+        # sem renderizar: escrita ainda pendente, arquivo apagado ou editado fora da aplicação
+        if self.pending_config_ids([device_instance.id]):
+            return True
+        return device_instance.config_hash != hash_config_file(device_instance.config_file)
 
     def update_device_config(self, config_file, device_instance):
-        device_config = Template(self.device_config_template).substitute(
-            name=device_instance.name,
-            platform=device_instance.platform,
-            board=device_instance.board,
-            wifi_ssid=device_instance.wifi_ssid,
-            wifi_password=device_instance.wifi_password,
-            ota_password=(
-                "" if device_instance.ota_password is None else device_instance.ota_password
-            ),
-            ap_ssid=device_instance.ap_ssid,
-            ap_password=device_instance.ap_password,
+        content = self.render_device_config(device_instance)
+        config_hash = hash_config(content)
+        unchanged = (
+            config_file == device_instance.config_file
+            and device_instance.config_hash == config_hash
+            and hash_config_file(device_instance.config_file) == config_hash
         )
-        if os.path.exists(config_file):
+        if unchanged:
+            print("arquivo de configuração sem alterações, escrita ignorada")
+            return False
+        write_file_atomic(device_instance.config_file, content)
+        if config_file != device_instance.config_file and os.path.exists(config_file):
             os.remove(config_file)
-        with open(device_instance.config_file, "w") as yaml_file:
-            yaml_file.write(device_config.strip() + "\n")
-        components = device_instance.components
-        print("componentes:", components)
-        if len(components) > 0:
-            # switch
-            switches = self.component_repository.filter_by({
-                "component_type": "switch",
-                "device_id": device_instance.id,
-            })
-            if len(switches) > 0:
-                switch_dict = {"switch": []}
-                for switch_component in switches:
-                    config_json = json.loads(switch_component.config_json)
-                    switch_dict["switch"].append(config_json)
-                with open(device_instance.config_file, "a") as yaml_file:
-                    yaml_file.write("\n" + dict_to_yaml(switch_dict))
-            # sensor
-            sensors = self.component_repository.filter_by({
-                "component_type": "sensor",
-                "device_id": device_instance.id,
-            })
-            if len(sensors) > 0:
-                sensor_dict = {"sensor": []}
-                for sensor_component in sensors:
-                    config_json = json.loads(sensor_component.config_json)
-                    sensor_dict["sensor"].append(config_json)
-                with open(device_instance.config_file, "a") as yaml_file:
-                    yaml_file.write("\n" + dict_to_yaml(sensor_dict))
-            # number
-            numbers = self.component_repository.filter_by({
-                "component_type": "number",
-                "device_id": device_instance.id,
-            })
-            if len(numbers) > 0:
-                number_dict = {"number": []}
-                for number_component in numbers:
-                    config_json = json.loads(number_component.config_json)
-                    number_dict["number"].append(config_json)
-                with open(device_instance.config_file, "a") as yaml_file:
-                    yaml_file.write("\n" + dict_to_yaml(number_dict))
-            # servo
-            servos = self.component_repository.filter_by({
-                "component_type": "servo",
-                "device_id": device_instance.id,
-            })
-            if len(servos) > 0:
-                servo_dict = {"servo": []}
-                for sensor_component in servos:
-                    config_json = json.loads(sensor_component.config_json)
-                    servo_dict["servo"].append(config_json)
-                with open(device_instance.config_file, "a") as yaml_file:
-                    yaml_file.write("\n" + dict_to_yaml(servo_dict))
-            # output
-            outputs = self.component_repository.filter_by({
-                "component_type": "output",
-                "device_id": device_instance.id,
-            })
-            if len(outputs) > 0:
-                output_dict = {"output": []}
-                for output_component in outputs:
-                    config_json = json.loads(output_component.config_json)
-                    output_dict["output"].append(config_json)
-                with open(device_instance.config_file, "a") as yaml_file:
-                    yaml_file.write("\n" + dict_to_yaml(output_dict))
-            # binary sensor
-            binary_sensors = self.component_repository.filter_by({
-                "component_type": "binary_sensor",
-                "device_id": device_instance.id,
-            })
-            if len(binary_sensors) > 0:
-                binary_sensor_dict = {"binary_sensor": []}
-                for binary_sensor_component in binary_sensors:
-                    config_json = json.loads(binary_sensor_component.config_json)
-                    binary_sensor_dict["binary_sensor"].append(config_json)
-                with open(device_instance.config_file, "a") as yaml_file:
-                    yaml_file.write("\n" + dict_to_yaml(binary_sensor_dict))
+        self.device_repository.update(device_instance.id, {"config_hash": config_hash})
+        if self.validation_service is not None:
+            self.validation_service.submit(config_hash, device_instance.config_file)
+        return True
+
+    def get_validation(self, device_id):
+        device = self.device_repository.get(device_id)
+        if device is None:
+            return jsonify({"error": "Dispositivo não encontrado"}), 404
+        result = self.validation_service.get_cached(device.config_hash) if device.config_hash else None
+        if result is None:
+            return jsonify({"device_id": device_id, "status": "pending"})
+        return jsonify({"device_id": device_id, "status": "valid" if result["valid"] else "invalid", **result})
+
+    def validate_devices(self, device_ids=None):
+        self.flush_configs(device_ids)
+        devices = self.device_repository.list_with_components(device_ids)
+        self.sync_device_configs(devices)
+        cached = self.validation_service.get_cached_many([device.config_hash for device in devices])
+        futures = {
+            device.id: self.validation_service.submit(device.config_hash, device.config_file)
+            for device in devices
+            if device.config_hash not in cached
+        }
+        results = []
+        for device in devices:
+            result = cached.get(device.config_hash)
+            if result is None:
+                result = futures[device.id].result()
+            results.append({"device_id": device.id, "device_name": device.name, **(result or {})})
+        return results
 
 
     def create_device(self, request: Request):
@@ -163,17 +304,52 @@ captive_portal:
             "ap_password": ap_password,
         }
         device = self.device_repository.create(data)
-        self.update_device_config(config_file=device.config_file, device_instance=device)
+        self.mark_config_dirty(device.id)
         return redirect(url_for("list_devices"))
     
 
-    def list_devices(self):
-        devices = self.device_repository.list_all()
-        print(devices)
-        return render_template("index.html", devices=devices)
+    def list_devices(self, after_id=None):
+        devices, next_cursor = self.device_repository.list_with_component_counts(
+            limit=self.config.devices_per_page, after_id=after_id
+        )
+        # a listagem não lê os arquivos do disco: mostra só as escritas ainda pendentes
+        dirty = self.pending_config_ids([device.id for device, _ in devices])
+        return render_template("index.html", devices=devices, dirty=dirty, next_cursor=next_cursor)
+    
+
+    def list_devices_api(self, args):
+        limit, after_id, fields = parse_page_args(args, self.api_fields, optional_fields=self.optional_api_fields)
+        filters = []
+        if args.get("platform"):
+            filters.append(Device.platform == args.get("platform"))
+        if args.get("board"):
+            filters.append(Device.board == args.get("board"))
+        if args.get("component_type"):
+            filters.append(Device.components.any(Component.component_type == args.get("component_type")))
+        if args.get("pin"):
+            filters.append(Device.components.any(Component.pin == args.get("pin")))
+        # "dirty" não é coluna: é calculado a partir do arquivo e do config_hash
+        columns = [field for field in fields if field != "dirty"]
+        if "dirty" in fields:
+            columns += [field for field in ("config_file", "config_hash") if field not in columns]
+        devices, next_cursor = self.device_repository.paginate(
+            limit=limit,
+            after_id=after_id,
+            filters=filters,
+            options=[load_only(*[getattr(Device, field) for field in columns])],
+        )
+        items = []
+        for device in devices:
+            item = {field: getattr(device, field) for field in fields if field != "dirty"}
+            if "dirty" in fields:
+                item["dirty"] = self.is_config_dirty(device)
+            items.append(item)
+        return jsonify({"items": items, "next_cursor": next_cursor})
     
 
     def delete_device(self, device_id):
+        # uma escrita pendente recriaria o arquivo depois da remoção
+        self.flush_configs([device_id])
         print("deletendo dispositivo do bd", device_id)
         device = self.device_repository.delete(device_id)
         if device:
@@ -212,6 +388,6 @@ captive_portal:
             print("atualizando dispositivo")
             device = self.device_repository.update(device_id, data)
             print("atualizando arquivo de configuração do dispositivo...")
-            self.update_device_config(config_file=old_config_file, device_instance=device)
+            self.mark_config_dirty(device.id, old_config_file)
             return redirect(url_for("list_devices"))
-        return render_template("edit-device.html", device=device)
+        return render_template("edit-device.html", device=device, component_types=form_component_types())
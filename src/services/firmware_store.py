@@ -0,0 +1,74 @@
+import hashlib
+import os
+import shutil
+import threading
+from src.config import Config
+from src.utils import esphome_version
+
+
+class FirmwareStore:
+    def __init__(self):
+        self.config = Config()
+        self._lock = threading.Lock()
+
+    def key(self, config_hash):
+        return hashlib.sha256(f"{config_hash}:{esphome_version()}".encode("utf-8")).hexdigest()
+
+    def path(self, config_hash):
+        key = self.key(config_hash)
+        return os.path.join(self.config.firmware_dir, key[:2], f"{key}.bin")
+
+    def has(self, config_hash):
+        return config_hash is not None and os.path.exists(self.path(config_hash))
+
+    def get(self, config_hash):
+        path = self.path(config_hash)
+        try:
+            # a data de modificação marca o último uso para a remoção LRU
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def put(self, config_hash, source_path, protected=()):
+        target = self.path(config_hash)
+        tmp_path = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with self._lock:
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.copyfile(source_path, tmp_path)
+            os.replace(tmp_path, target)
+        self.evict(protected={target, *(self.path(config_hash) for config_hash in protected)})
+        return target
+
+    def usage(self):
+        entries = []
+        for directory, _, files in os.walk(self.config.firmware_dir):
+            for file_name in files:
+                if not file_name.endswith(".bin"):
+                    continue
+                path = os.path.join(directory, file_name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def evict(self, protected=()):
+        with self._lock:
+            entries = sorted(self.usage())
+            total_size = sum(size for _, size, _ in entries)
+            removed = 0
+            for _, size, path in entries:
+                if total_size <= self.config.firmware_cache_max_bytes:
+                    break
+                if path in protected:
+                    continue
+                try:
+                    os.remove(path)
+                    os.rmdir(os.path.dirname(path))
+                except OSError:
+                    pass
+                total_size -= size
+                removed += 1
+            return removed
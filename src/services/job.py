@@ -0,0 +1,562 @@
+import codecs
+import os
+import re
+import shlex
+import signal
+import socket
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+from src.config import Config
+from src.models.job import JobStatus
+from src.repositories.device import DeviceRepository
+from src.repositories.job import JobRepository
+from src.runtime import ThreadingRuntime
+from src.services.build_environment import BuildEnvironmentManager
+from src.services.firmware_store import FirmwareStore
+from src.utils import hash_config_file
+
+
+COMPILE = "compile"
+UPLOAD = "upload"
+OTA = "ota"
+FLASH_KINDS = (UPLOAD, OTA)
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+@dataclass
+class QueuedJob:
+    id: int
+    kind: str
+    device_id: int
+    device_name: str
+    config_file: str
+    config_hash: Optional[str]
+    serial_port: Optional[str]
+    command: list
+    depends_on: Optional[int] = None
+    batch_id: Optional[str] = None
+    build_group: Optional[str] = None
+
+
+class JobService:
+    def __init__(
+        self,
+        job_repository: JobRepository,
+        device_repository: DeviceRepository,
+        firmware_store: FirmwareStore,
+        build_environment: BuildEnvironmentManager,
+    ):
+        self.job_repository = job_repository
+        self.device_repository = device_repository
+        self.firmware_store = firmware_store
+        self.build_environment = build_environment
+        self.config = Config()
+        self.app = None
+        self.runtime = ThreadingRuntime()
+        self.output_handlers = []
+        self.status_handlers = []
+        self._condition = self.runtime.condition()
+        self._pending: list[QueuedJob] = []
+        self._busy_devices = set()
+        self._busy_ports = set()
+        self._running = {COMPILE: 0, UPLOAD: 0, OTA: 0}
+        self._finished = {}
+        self._active = set()
+        self._compiling = {}
+        self._processes = {}
+        self._cancelled = set()
+        self._workers = []
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+
+    def init_app(self, app, runtime=None):
+        self.app = app
+        if runtime is not None:
+            self.runtime = runtime
+            self._condition = runtime.condition()
+
+    def sleep(self, seconds):
+        self.runtime.sleep(seconds)
+
+    def add_output_handler(self, handler):
+        self.output_handlers.append(handler)
+
+    def add_status_handler(self, handler):
+        self.status_handlers.append(handler)
+
+    def has_firmware(self, device):
+        return self.firmware_store.has(device.config_hash)
+
+    def submit_compile(self, device, batch_id=None):
+        with self._condition:
+            compiling_job_id = self._compiling.get((device.config_hash, batch_id))
+        if compiling_job_id is not None:
+            return self.job_repository.get(compiling_job_id)
+        command = [self.config.esphome_executable, "compile", device.config_file]
+        return self._submit(
+            COMPILE, device, command,
+            batch_id=batch_id,
+            build_group=self.build_environment.group(device),
+        )
+
+    def submit_upload(self, device, serial_port):
+        return self._submit_flash(UPLOAD, device, serial_port)
+
+    def submit_ota(self, device, host=None, batch_id=None):
+        # sem endereço explícito o ESPHome resolve <nome>.local via mDNS
+        return self._submit_flash(OTA, device, host or f"{device.name}.local", batch_id=batch_id)
+
+    def _submit_flash(self, kind, device, target, batch_id=None):
+        compile_job = None
+        if not self.has_firmware(device):
+            compile_job = self.submit_compile(device, batch_id=batch_id)
+        command = [
+            self.config.esphome_executable, "upload", device.config_file,
+            "--device", target, "--file", self.firmware_store.path(device.config_hash),
+        ]
+        return self._submit(
+            kind, device, command,
+            serial_port=target,
+            depends_on=compile_job.id if compile_job else None,
+            batch_id=batch_id,
+        )
+
+    def _submit(
+        self, kind, device, command,
+        serial_port=None, depends_on=None, batch_id=None, build_group=None,
+    ):
+        self._start_workers()
+        job = self.job_repository.create({
+            "device_id": device.id,
+            "device_name": device.name,
+            "kind": kind,
+            "serial_port": serial_port,
+            "command": shlex.join(command),
+            "config_hash": device.config_hash,
+            "depends_on_id": depends_on,
+            "batch_id": batch_id,
+            "build_group": build_group,
+            "owner": self.owner,
+            "status": JobStatus.QUEUED,
+            "created_at": datetime.now(),
+        })
+        queued_job = QueuedJob(
+            id=job.id,
+            kind=kind,
+            device_id=device.id,
+            device_name=device.name,
+            config_file=device.config_file,
+            config_hash=device.config_hash,
+            serial_port=serial_port,
+            command=command,
+            depends_on=depends_on,
+            batch_id=batch_id,
+            build_group=build_group,
+        )
+        with self._condition:
+            if kind == COMPILE:
+                self._compiling[(device.config_hash, batch_id)] = job.id
+            if depends_on is not None and not self._is_tracked(depends_on):
+                # a compilação terminou antes deste job entrar na fila; o status fica no banco
+                self._finished[depends_on] = self.job_repository.get(depends_on).status
+            self._pending.append(queued_job)
+            self._condition.notify_all()
+        self._notify_status(job)
+        return job
+
+    def cancel(self, job_id):
+        with self._condition:
+            queued_job = next((job for job in self._pending if job.id == job_id), None)
+            if queued_job is not None:
+                self._pending.remove(queued_job)
+            running = job_id in self._processes
+            process = self._processes.get(job_id)
+            if running:
+                self._cancelled.add(job_id)
+                self._condition.notify_all()
+        if queued_job is not None:
+            self._finish(queued_job, JobStatus.CANCELLED, None)
+            with self._condition:
+                self._prune_finished(queued_job.id)
+                self._prune_finished(queued_job.depends_on)
+            return True
+        if process is not None:
+            self._terminate(process)
+        return running
+
+    def get_job(self, job_id):
+        return self.job_repository.get(job_id)
+
+    def list_jobs(self, limit=50, device_id=None):
+        return self.job_repository.list_recent(limit, device_id=device_id)
+
+    def serialize_job(self, job):
+        return {
+            "id": job.id,
+            "device_id": job.device_id,
+            "device_name": job.device_name,
+            "kind": job.kind,
+            "serial_port": job.serial_port,
+            "command": job.command,
+            "config_hash": job.config_hash,
+            "depends_on_id": job.depends_on_id,
+            "batch_id": job.batch_id,
+            "build_group": job.build_group,
+            "cache_hits": job.cache_hits,
+            "cache_misses": job.cache_misses,
+            "status": job.status,
+            "return_code": job.return_code,
+            "created_at": job.created_at.isoformat() if job.created_at else None,
+            "started_at": job.started_at.isoformat() if job.started_at else None,
+            "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+        }
+
+    def _start_workers(self):
+        with self._condition:
+            if self._workers:
+                return
+            # jobs que ficaram pendentes quando o processo dono parou não serão retomados;
+            # os de um servidor ou de outro comando da CLI ainda em execução não são tocados
+            for job in self.job_repository.list_by_status([JobStatus.QUEUED, JobStatus.RUNNING]):
+                if self._owner_alive(job.owner):
+                    continue
+                self.job_repository.update(job.id, {
+                    "status": JobStatus.FAILED,
+                    "finished_at": datetime.now(),
+                })
+            workers = (
+                max(1, self.config.build_workers)
+                + max(1, self.config.flash_workers)
+                + max(1, self.config.ota_workers)
+            )
+            for index in range(workers):
+                self._workers.append(self.runtime.spawn(self._worker_loop, name=f"job-worker-{index}"))
+
+    def _owner_alive(self, owner):
+        if owner is None:
+            return False
+        host, _, pid = owner.rpartition(":")
+        if host != socket.gethostname() or os.name != "posix":
+            # sem como verificar outro host (ou sem os.kill(pid, 0)): assume que ainda está rodando
+            return True
+        try:
+            os.kill(int(pid), 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            pass
+        return True
+
+    def _next_runnable(self):
+        limits = {
+            COMPILE: max(1, self.config.build_workers),
+            UPLOAD: max(1, self.config.flash_workers),
+            OTA: max(1, self.config.ota_workers),
+        }
+        for job in self._pending:
+            if job.depends_on is not None and job.depends_on not in self._finished:
+                continue
+            if self._running[job.kind] >= limits[job.kind]:
+                continue
+            # o compile usa o diretório de build do dispositivo; o upload só precisa da porta ou do host
+            if job.kind == COMPILE and job.device_id in self._busy_devices:
+                continue
+            if job.kind in FLASH_KINDS and job.serial_port in self._busy_ports:
+                continue
+            return job
+        return None
+
+    def _acquire(self, job: QueuedJob):
+        self._pending.remove(job)
+        self._active.add(job.id)
+        self._running[job.kind] += 1
+        if job.kind == COMPILE:
+            self._busy_devices.add(job.device_id)
+        else:
+            self._busy_ports.add(job.serial_port)
+
+    def _release(self, job: QueuedJob):
+        self._active.discard(job.id)
+        self._running[job.kind] -= 1
+        if job.kind == COMPILE:
+            self._busy_devices.discard(job.device_id)
+        else:
+            self._busy_ports.discard(job.serial_port)
+        self._prune_finished(job.id)
+        self._prune_finished(job.depends_on)
+
+    def _is_tracked(self, job_id):
+        return (
+            job_id in self._finished
+            or job_id in self._active
+            or any(pending.id == job_id for pending in self._pending)
+        )
+
+    def _prune_finished(self, job_id):
+        # o status só é guardado enquanto algum job da fila depende dele
+        if job_id in self._finished and not any(pending.depends_on == job_id for pending in self._pending):
+            del self._finished[job_id]
+
+    def _worker_loop(self):
+        while True:
+            with self._condition:
+                job = self._next_runnable()
+                while job is None:
+                    self._condition.wait()
+                    job = self._next_runnable()
+                self._acquire(job)
+                dependency_status = self._finished.get(job.depends_on)
+            try:
+                if dependency_status is not None and dependency_status != JobStatus.SUCCEEDED:
+                    self._notify_output(job, "[Erro] A compilação do firmware não foi concluída.\n")
+                    with self.app.app_context():
+                        self._finish(job, dependency_status, None)
+                else:
+                    self._run(job)
+            except Exception as error:
+                # um erro inesperado falha só este job; o worker continua atendendo a fila
+                print(f"erro ao executar o job {job.id}: {error!r}")
+                self._fail(job, error)
+            finally:
+                with self._condition:
+                    self._release(job)
+                    self._condition.notify_all()
+
+    def _fail(self, job: QueuedJob, error):
+        try:
+            self._notify_output(job, f"[Erro] {error}\n")
+            with self.app.app_context():
+                self._finish(job, JobStatus.FAILED, None)
+        except Exception as finish_error:
+            print(f"erro ao marcar o job {job.id} como falho: {finish_error!r}")
+            # mesmo sem o banco, os jobs que dependem deste não podem ficar esperando
+            self._mark_finished(job, JobStatus.FAILED)
+
+    def _run(self, job: QueuedJob):
+        # o contexto (e a conexão com o banco) só fica aberto durante os acessos ao banco,
+        # nunca enquanto o processo está rodando
+        with self.app.app_context():
+            self._update(job.id, {"status": JobStatus.RUNNING, "started_at": datetime.now()})
+            if job.kind == COMPILE and self.firmware_store.get(job.config_hash) is not None:
+                self._notify_output(job, "Firmware já compilado, usando o cache.\n")
+                self._finish(job, JobStatus.SUCCEEDED, 0)
+                return
+            if job.kind in FLASH_KINDS and self.firmware_store.get(job.config_hash) is None:
+                self._notify_output(job, "[Erro] Firmware não está mais no cache, refaça o upload.\n")
+                self._finish(job, JobStatus.FAILED, None)
+                return
+        environment = None
+        if job.build_group is not None:
+            environment = {**os.environ, **self.build_environment.environment(job.build_group)}
+        cache_stats = {"hit": 0, "miss": 0}
+        attempts = self.config.ota_retries + 1 if job.kind == OTA else 1
+        timeout = self.config.ota_timeout if job.kind == OTA else None
+        with self._condition:
+            self._processes[job.id] = None
+        return_code = None
+        stored = True
+        lock = None
+        try:
+            # o servidor e os comandos da CLI compartilham os diretórios de build e as portas
+            lock = self._lock_target(job)
+            runnable = lock is not None and (job.kind != COMPILE or self._config_matches(job))
+            for attempt in range(attempts if runnable else 0):
+                if attempt > 0:
+                    delay = self.config.ota_retry_backoff * 2 ** (attempt - 1)
+                    self._notify_output(job, f"Nova tentativa ({attempt + 1}/{attempts}) em {delay:g}s...\n")
+                    if self._wait_cancelled(job, delay):
+                        break
+                return_code = self._execute(job, environment, timeout, cache_stats)
+                if return_code == 0 or job.id in self._cancelled:
+                    break
+            if return_code == 0 and job.kind == COMPILE and job.id not in self._cancelled:
+                # ainda com a trava: outro processo não pode sobrescrever o firmware.bin antes da cópia.
+                # o arquivo é conferido de novo: o firmware só entra no cache sob o hash do que foi compilado
+                stored = self._config_matches(job) and self._store_firmware(job)
+        finally:
+            if lock is not None:
+                lock.close()
+            with self._condition:
+                self._processes.pop(job.id, None)
+                cancelled = job.id in self._cancelled
+                self._cancelled.discard(job.id)
+        if cancelled:
+            status = JobStatus.CANCELLED
+        elif return_code == 0 and stored:
+            status = JobStatus.SUCCEEDED
+        else:
+            status = JobStatus.FAILED
+        with self.app.app_context():
+            if job.build_group is not None:
+                self.job_repository.update(job.id, {
+                    "cache_hits": cache_stats["hit"],
+                    "cache_misses": cache_stats["miss"],
+                })
+            self._finish(job, status, return_code)
+
+    def _config_matches(self, job: QueuedJob):
+        # o compile lê o YAML do disco, que o write-behind pode ter reescrito depois do envio do job
+        if hash_config_file(job.config_file) != job.config_hash:
+            self._notify_output(job, "[Erro] O arquivo de configuração mudou depois que o job foi enfileirado; envie novamente.\n")
+            return False
+        return True
+
+    def _lock_target(self, job: QueuedJob):
+        # trava entre processos; dentro do processo a fila já garante um job por dispositivo/porta
+        if job.kind == COMPILE:
+            name = f"device-{job.device_id}"
+        else:
+            name = "port-" + re.sub(r"[^A-Za-z0-9_.-]", "_", job.serial_port)
+        os.makedirs(self.config.lock_dir, exist_ok=True)
+        lock_file = open(os.path.join(self.config.lock_dir, f"{name}.lock"), "w")
+        if fcntl is None:
+            return lock_file
+        waiting = False
+        while True:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return lock_file
+            except BlockingIOError:
+                if not waiting:
+                    self._notify_output(job, "Aguardando outro processo liberar o dispositivo ou a porta...\n")
+                    waiting = True
+                if self._wait_cancelled(job, 1):
+                    lock_file.close()
+                    return None
+
+    def _execute(self, job: QueuedJob, environment, timeout, cache_stats):
+        subprocess = self.runtime.subprocess
+        try:
+            process = subprocess.Popen(
+                job.command,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                bufsize=0,
+                env=environment,
+                start_new_session=(os.name == "posix"),
+            )
+        except OSError as error:
+            self._notify_output(job, f"[Erro] {error}\n")
+            return None
+        with self._condition:
+            self._processes[job.id] = process
+            cancelled = job.id in self._cancelled
+        if cancelled:
+            self._terminate(process)
+        timer = None
+        if timeout:
+            timer = self.runtime.call_later(timeout, self._timeout, job, process, timeout)
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        partial = ""
+        try:
+            # lê em blocos e repassa as linhas completas de uma vez; sem buffer o read devolve
+            # o que já está no pipe e, com eventlet, cede o hub enquanto ele está vazio
+            for chunk in iter(lambda: process.stdout.read(8192), b""):
+                text = partial + decoder.decode(chunk)
+                lines = text.splitlines(keepends=True)
+                partial = lines.pop() if lines and not lines[-1].endswith("\n") else ""
+                if lines:
+                    self._process_lines(job, lines, cache_stats)
+                if self.runtime.cooperative:
+                    # com o pipe sempre cheio a leitura nunca bloqueia; cede o hub a cada bloco
+                    self.runtime.sleep(0)
+            partial += decoder.decode(b"", final=True)
+            if partial:
+                self._process_lines(job, [partial], cache_stats)
+            process.stdout.close()
+            return process.wait()
+        finally:
+            if timer is not None:
+                timer.cancel()
+            with self._condition:
+                self._processes[job.id] = None
+
+    def _process_lines(self, job: QueuedJob, lines, cache_stats):
+        if job.build_group is not None:
+            hits, misses = self.build_environment.count_cache("".join(lines))
+            cache_stats["hit"] += hits
+            cache_stats["miss"] += misses
+        self._notify_lines(job, lines)
+
+    def _timeout(self, job: QueuedJob, process, timeout):
+        if process.poll() is None:
+            self._notify_output(job, f"[Erro] Tempo limite de {timeout:g}s excedido.\n")
+            self._terminate(process)
+
+    def _wait_cancelled(self, job: QueuedJob, delay):
+        deadline = time.monotonic() + delay
+        with self._condition:
+            while job.id not in self._cancelled:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+            return True
+
+    def _store_firmware(self, job: QueuedJob):
+        build_firmware = os.path.join(
+            os.path.dirname(job.config_file), ".esphome", "build", job.device_name,
+            ".pioenvs", job.device_name, "firmware.bin",
+        )
+        if not os.path.exists(build_firmware):
+            self._notify_output(job, f"[Erro] Firmware não encontrado em {build_firmware}\n")
+            return False
+        with self._condition:
+            # firmwares que ainda serão gravados não podem ser removidos do cache
+            protected = {pending.config_hash for pending in self._pending if pending.kind in FLASH_KINDS}
+        self.firmware_store.put(job.config_hash, build_firmware, protected=protected)
+        return True
+
+    def _terminate(self, process, timeout=5):
+        def kill(sig):
+            if process.poll() is not None:
+                return
+            try:
+                if os.name == "posix":
+                    os.killpg(process.pid, sig)
+                elif sig == signal.SIGTERM:
+                    process.terminate()
+                else:
+                    process.kill()
+            except ProcessLookupError:
+                pass
+        kill(signal.SIGTERM)
+        self.runtime.call_later(timeout, kill, getattr(signal, "SIGKILL", signal.SIGTERM))
+
+    def _finish(self, job: QueuedJob, status, return_code):
+        self._mark_finished(job, status)
+        self._update(job.id, {
+            "status": status,
+            "return_code": return_code,
+            "finished_at": datetime.now(),
+        })
+
+    def _mark_finished(self, job: QueuedJob, status):
+        with self._condition:
+            self._finished[job.id] = status
+            compile_key = (job.config_hash, job.batch_id)
+            if job.kind == COMPILE and self._compiling.get(compile_key) == job.id:
+                del self._compiling[compile_key]
+            self._condition.notify_all()
+
+    def _update(self, job_id, data):
+        job = self.job_repository.update(job_id, data)
+        self._notify_status(job)
+        return job
+
+    def _notify_output(self, job: QueuedJob, line):
+        self._notify_lines(job, [line])
+
+    def _notify_lines(self, job: QueuedJob, lines):
+        for handler in self.output_handlers:
+            handler(job.id, job.device_id, lines)
+
+    def _notify_status(self, job):
+        payload = self.serialize_job(job)
+        for handler in self.status_handlers:
+            handler(payload)
@@ -0,0 +1,123 @@
+import os
+import struct
+import threading
+import time
+from itertools import accumulate
+from src.config import Config
+
+
+OFFSET = struct.Struct("<Q")
+
+
+class LogStore:
+    def __init__(self):
+        self.config = Config()
+        self._lock = threading.Lock()
+        self._open = {}
+
+    def log_path(self, job_id):
+        return os.path.join(self.config.log_dir, f"job-{job_id}.log")
+
+    def index_path(self, job_id):
+        return os.path.join(self.config.log_dir, f"job-{job_id}.idx")
+
+    def append(self, job_id, lines):
+        with self._lock:
+            handles = self._open.get(job_id)
+            if handles is None:
+                handles = self._open_job(job_id)
+            log_file, index_file = handles
+            encoded = [line.encode("utf-8") for line in lines]
+            offsets = list(accumulate((len(data) for data in encoded[:-1]), initial=log_file.tell()))
+            log_file.write(b"".join(encoded))
+            log_file.flush()
+            first_line = index_file.tell() // OFFSET.size
+            index_file.write(struct.pack(f"<{len(offsets)}Q", *offsets))
+            index_file.flush()
+            return first_line
+
+    def close(self, job_id):
+        with self._lock:
+            handles = self._open.pop(job_id, None)
+        if handles is not None:
+            for handle in handles:
+                handle.close()
+
+    def count_lines(self, job_id):
+        try:
+            return os.path.getsize(self.index_path(job_id)) // OFFSET.size
+        except FileNotFoundError:
+            return 0
+
+    def read(self, job_id, offset=None, tail=None, limit=1000):
+        total = self.count_lines(job_id)
+        if tail is not None:
+            # tail negativo apontaria além do fim e devolveria um next_offset inválido
+            start = max(0, total - max(tail, 0))
+        else:
+            start = min(max(0, offset or 0), total)
+        end = min(total, start + limit)
+        lines = []
+        if end > start:
+            with open(self.index_path(job_id), "rb") as index_file:
+                index_file.seek(start * OFFSET.size)
+                offsets = [
+                    value for (value,) in OFFSET.iter_unpack(index_file.read((end - start) * OFFSET.size))
+                ]
+                next_line = index_file.read(OFFSET.size)
+            with open(self.log_path(job_id), "rb") as log_file:
+                log_file.seek(offsets[0])
+                if len(next_line) == OFFSET.size:
+                    data = log_file.read(OFFSET.unpack(next_line)[0] - offsets[0])
+                else:
+                    data = log_file.read()
+                    # o último byte pode pertencer a uma linha ainda não indexada
+                    last_line_end = data.find(b"\n", offsets[-1] - offsets[0]) + 1
+                    if last_line_end > 0:
+                        data = data[:last_line_end]
+            bounds = [offset - offsets[0] for offset in offsets] + [len(data)]
+            lines = [
+                data[bounds[i]:bounds[i + 1]].decode("utf-8", errors="replace")
+                for i in range(len(offsets))
+            ]
+        return {
+            "job_id": job_id,
+            "offset": start,
+            "next_offset": start + len(lines),
+            "total": total,
+            "lines": lines,
+        }
+
+    def rotate(self):
+        if not os.path.isdir(self.config.log_dir):
+            return 0
+        with self._lock:
+            active = {f"job-{job_id}" for job_id in self._open}
+        jobs = {}
+        for entry in os.scandir(self.config.log_dir):
+            name, extension = os.path.splitext(entry.name)
+            if extension not in (".log", ".idx") or name in active:
+                continue
+            size, modified = jobs.get(name, (0, 0))
+            stat = entry.stat()
+            jobs[name] = (size + stat.st_size, max(modified, stat.st_mtime))
+        max_age = time.time() - self.config.log_max_age_days * 86400
+        total_size = sum(size for size, _ in jobs.values())
+        removed = 0
+        # remove primeiro os logs mais antigos
+        for name, (size, modified) in sorted(jobs.items(), key=lambda item: item[1][1]):
+            if modified >= max_age and total_size <= self.config.log_max_bytes:
+                break
+            for extension in (".log", ".idx"):
+                path = os.path.join(self.config.log_dir, name + extension)
+                if os.path.exists(path):
+                    os.remove(path)
+            total_size -= size
+            removed += 1
+        return removed
+
+    def _open_job(self, job_id):
+        os.makedirs(self.config.log_dir, exist_ok=True)
+        handles = (open(self.log_path(job_id), "ab"), open(self.index_path(job_id), "ab"))
+        self._open[job_id] = handles
+        return handles
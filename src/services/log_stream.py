@@ -0,0 +1,74 @@
+import threading
+
+
+def device_room(device_id):
+    return f"device-{device_id}"
+
+
+class LogStreamer:
+    def __init__(
+        self,
+        flush_interval=0.1,
+        max_batch_lines=500,
+        max_pending_lines=2000,
+    ):
+        self.socketio = None
+        self.flush_interval = flush_interval
+        self.max_batch_lines = max_batch_lines
+        self.max_pending_lines = max_pending_lines
+        self._lock = threading.Lock()
+        self._buffers = {}
+        self._dropped = {}
+        self._flusher = None
+
+    def init_socketio(self, socketio):
+        self.socketio = socketio
+
+    def push(self, job_id, device_id, lines, first_line=None):
+        with self._lock:
+            buffer = self._buffers.setdefault((job_id, device_id), [])
+            if first_line is None:
+                buffer.extend((None, line) for line in lines)
+            else:
+                buffer.extend(enumerate(lines, first_line))
+            # o envio não está acompanhando a saída: mantém só o final e resume o resto.
+            # o limite é por job (uma sala), não por cliente: quem ficou para trás usa o
+            # offset dos lotes e o /jobs/<id>/log para buscar o que faltou
+            if len(buffer) > self.max_pending_lines:
+                dropped = len(buffer) - self.max_batch_lines
+                del buffer[:dropped]
+                self._dropped[(job_id, device_id)] = self._dropped.get((job_id, device_id), 0) + dropped
+
+    def start(self):
+        # chamado pelo init_socketio: com eventlet a tarefa é um greenlet do hub do servidor
+        with self._lock:
+            if self._flusher is None:
+                self._flusher = self.socketio.start_background_task(self._flush_loop)
+
+    def flush(self):
+        with self._lock:
+            batches = []
+            for key, buffer in self._buffers.items():
+                if not buffer and key not in self._dropped:
+                    continue
+                batches.append((key, buffer[:self.max_batch_lines], self._dropped.pop(key, 0)))
+                del buffer[:self.max_batch_lines]
+            self._buffers = {key: buffer for key, buffer in self._buffers.items() if buffer}
+        for (job_id, device_id), entries, dropped in batches:
+            self.socketio.emit(
+                "log_batch",
+                {
+                    "job_id": job_id,
+                    "device_id": device_id,
+                    "offset": entries[0][0] if entries else None,
+                    "lines": [line for _, line in entries],
+                    "dropped": dropped,
+                },
+                to=device_room(device_id),
+            )
+        return len(batches)
+
+    def _flush_loop(self):
+        while True:
+            self.socketio.sleep(self.flush_interval)
+            self.flush()
@@ -0,0 +1,90 @@
+import threading
+import time
+from src.repositories.job import JobRepository
+from src.utils import list_serial_ports
+
+
+class PortRegistry:
+    def __init__(self, job_repository: JobRepository, scan_interval=2.0):
+        self.socketio = None
+        self.job_repository = job_repository
+        self.scan_interval = scan_interval
+        self.app = None
+        self._lock = threading.Lock()
+        self._ports = None
+        self._scanned_at = None
+        self._last_flashed = None
+        self._scanner = None
+
+    def init_app(self, app):
+        self.app = app
+
+    def init_socketio(self, socketio):
+        self.socketio = socketio
+
+    def start(self):
+        # assim como o LogStreamer, precisa ser iniciado a partir do loop do servidor
+        with self._lock:
+            if self._scanner is None:
+                self._scanner = self.socketio.start_background_task(self._scan_loop)
+
+    def list_ports(self):
+        # sem clientes Socket.IO o scanner não roda; a requisição refaz a varredura se o cache expirou
+        if self._scanned_at is None or time.monotonic() - self._scanned_at >= self.scan_interval:
+            self.scan()
+        with self._lock:
+            return self._serialize()
+
+    def scan(self):
+        ports = self._read_ports()
+        with self._lock:
+            if self._last_flashed is None:
+                self._last_flashed = self._load_last_flashed()
+            changed = ports != self._ports
+            self._ports = ports
+            self._scanned_at = time.monotonic()
+            payload = self._serialize()
+        if changed and self.socketio is not None:
+            self.socketio.emit("ports_changed", payload)
+        return changed
+
+    def record_flash(self, serial_port, device_id, device_name):
+        with self._lock:
+            if self._last_flashed is None:
+                self._last_flashed = self._load_last_flashed()
+            self._last_flashed[serial_port] = {"id": device_id, "name": device_name}
+            if self._ports is None or serial_port not in self._ports:
+                return
+            payload = self._serialize()
+        if self.socketio is not None:
+            self.socketio.emit("ports_changed", payload)
+
+    def _serialize(self):
+        return [
+            {**port, "device": self._last_flashed.get(name)}
+            for name, port in (self._ports or {}).items()
+        ]
+
+    def _read_ports(self):
+        if self.socketio is not None and self.socketio.async_mode == "eventlet":
+            # a varredura lê o sysfs de forma bloqueante; roda fora do loop do eventlet
+            from eventlet import tpool
+            ports = tpool.execute(list_serial_ports)
+        else:
+            ports = list_serial_ports()
+        return {port["port"]: port for port in ports}
+
+    def _load_last_flashed(self):
+        with self.app.app_context():
+            return {
+                job.serial_port: {"id": job.device_id, "name": job.device_name}
+                for job in self.job_repository.last_upload_by_port()
+            }
+
+    def _scan_loop(self):
+        while True:
+            try:
+                self.scan()
+            except Exception as error:
+                print(f"erro ao buscar portas seriais: {error}")
+            self.socketio.sleep(self.scan_interval)
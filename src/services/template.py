@@ -0,0 +1,168 @@
+import os
+from flask import jsonify
+from sqlalchemy.orm import selectinload
+from src.config import Config
+from src.models.device import Device
+from src.repositories.component import ComponentRepository
+from src.repositories.device import DeviceRepository
+from src.repositories.template import DeviceTemplateRepository
+from src.services.component import ComponentService
+from src.services.device import DeviceService
+from src.utils import generate_password, is_device_name
+
+
+class TemplateService:
+    def __init__(
+        self,
+        template_repository: DeviceTemplateRepository,
+        device_repository: DeviceRepository,
+        component_repository: ComponentRepository,
+        device_service: DeviceService,
+        component_service: ComponentService,
+    ):
+        self.template_repository = template_repository
+        self.device_repository = device_repository
+        self.component_repository = component_repository
+        self.device_service = device_service
+        self.component_service = component_service
+        self.config = Config()
+        self.max_devices_per_stamp = 1000
+
+    def serialize_template(self, template):
+        return {
+            "id": template.id,
+            "name": template.name,
+            "platform": template.platform,
+            "board": template.board,
+            "components": template.components_json,
+        }
+
+    def list_templates(self):
+        return jsonify([self.serialize_template(template) for template in self.template_repository.list_all()])
+
+    def create_template(self, data):
+        if not isinstance(data, dict):
+            return jsonify({"error": "O corpo da requisição deve ser um objeto JSON"}), 400
+        if not data.get("name") or not isinstance(data["name"], str):
+            return jsonify({"error": "Informe o nome do modelo"}), 400
+        if data.get("device_id") is not None:
+            device = self.device_repository.get_with_components(data["device_id"])
+            if device is None:
+                return jsonify({"error": "Dispositivo não encontrado"}), 404
+            platform, board = device.platform, device.board
+            components = self.snapshot_components(device)
+        else:
+            platform, board = data.get("platform"), data.get("board")
+            components = data.get("components") or []
+            if not platform or not board:
+                return jsonify({"error": "Informe platform e board"}), 400
+            errors = self.component_service.validate_component_items(components)
+            if errors:
+                return jsonify({"errors": errors}), 400
+        # cada dispositivo carimbado recebe todos os componentes: um pino repetido quebraria todos
+        conflicts = self.component_service.item_pin_conflicts(components)
+        if conflicts:
+            return jsonify({"errors": conflicts}), 409
+        if self.template_repository.find_one({"name": data["name"]}) is not None:
+            return jsonify({"error": "Já existe um modelo com esse nome"}), 409
+        template = self.template_repository.create({
+            "name": data["name"],
+            "platform": platform,
+            "board": board,
+            "components_json": components,
+        })
+        print(f"modelo {template.name} criado com {len(components)} componente(s)")
+        return jsonify(self.serialize_template(template)), 201
+
+    def snapshot_components(self, device):
+        children = {}
+        for component in device.components:
+            if component.parent_id is not None:
+                children.setdefault(component.parent_id, []).append(component)
+
+        def item(component):
+            entry = {"component_type": component.component_type, "config_json": component.config_json}
+            if component.id in children:
+                entry["children"] = [item(child) for child in children[component.id]]
+            return entry
+
+        return [item(component) for component in device.components if component.parent_id is None]
+
+    def stamp_devices(self, template_id, data):
+        template = self.template_repository.get(template_id)
+        if template is None:
+            return jsonify({"error": "Modelo não encontrado"}), 404
+        if not isinstance(data, dict):
+            return jsonify({"error": "O corpo da requisição deve ser um objeto JSON"}), 400
+        count = data.get("count")
+        if isinstance(count, bool) or not isinstance(count, int) or not 1 <= count <= self.max_devices_per_stamp:
+            return jsonify({"error": f"count deve estar entre 1 e {self.max_devices_per_stamp}"}), 400
+        start = data.get("start", 1)
+        if isinstance(start, bool) or not isinstance(start, int) or start < 0:
+            return jsonify({"error": "start deve ser um inteiro maior ou igual a 0"}), 400
+        if not data.get("wifi_ssid") or not data.get("wifi_password"):
+            return jsonify({"error": "Informe o wifi_ssid e o wifi_password"}), 400
+        prefix = data.get("name_prefix") or template.name
+        if not is_device_name(prefix):
+            return jsonify({"error": "name_prefix deve ter só letras minúsculas, números e hífens"}), 400
+        width = len(str(start + count - 1))
+        names = [f"{prefix}-{str(index).zfill(width)}" for index in range(start, start + count)]
+        config_files = [os.path.join(self.config.esphome_dir, f"{name}.yaml") for name in names]
+        ap_ssids = [f"{name.title()} Fallback Hotspot" for name in names]
+        conflicts = self.device_repository.find_conflicts(names, config_files, ap_ssids)
+        if conflicts:
+            return jsonify({
+                "error": "Já existem dispositivos com esses nomes",
+                "devices": [device.name for device in conflicts],
+            }), 409
+        # sem o diretório a escrita dos arquivos falharia depois do commit
+        os.makedirs(self.config.esphome_dir, exist_ok=True)
+        # todos os dispositivos e componentes em uma única transação
+        try:
+            devices = self.device_repository.create_all([
+                {
+                    "name": name,
+                    "platform": template.platform,
+                    "board": template.board,
+                    "wifi_ssid": data["wifi_ssid"],
+                    "wifi_password": data["wifi_password"],
+                    "ota_password": generate_password(),
+                    "config_file": config_file,
+                    "ap_ssid": ap_ssid,
+                    "ap_password": generate_password(),
+                }
+                for name, config_file, ap_ssid in zip(names, config_files, ap_ssids)
+            ], commit=False)
+            # um nível da árvore por vez: os filhos precisam do id do componente pai
+            level = [(device.id, item, None) for device in devices for item in template.components_json]
+            while level:
+                components = self.component_repository.create_all([
+                    {
+                        "component_type": item["component_type"],
+                        "config_json": item["config_json"],
+                        "device_id": device_id,
+                        "parent_id": parent_id,
+                    }
+                    for device_id, item, parent_id in level
+                ], commit=False)
+                level = [
+                    (device_id, child, component.id)
+                    for (device_id, item, _), component in zip(level, components)
+                    for child in item.get("children") or []
+                ]
+            self.device_repository.commit()
+        except Exception:
+            self.device_repository.rollback()
+            raise
+        devices = self.device_repository.get_many(
+            [device.id for device in devices], options=[selectinload(Device.components)]
+        )
+        self.device_service.sync_device_configs(devices)
+        print(f"{len(devices)} dispositivo(s) criados a partir do modelo {template.name}")
+        return jsonify({
+            "template_id": template.id,
+            "items": [
+                {"id": device.id, "name": device.name, "config_file": device.config_file}
+                for device in devices
+            ],
+        }), 201
@@ -0,0 +1,126 @@
+import json
+import queue
+import subprocess
+import sys
+import threading
+from concurrent.futures import Future
+from datetime import datetime
+from src.repositories.validation import ConfigValidationRepository
+from src.utils import esphome_version, hash_config
+
+
+class ValidationService:
+    def __init__(self, validation_repository: ConfigValidationRepository):
+        self.validation_repository = validation_repository
+        self.app = None
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._thread = None
+        self._process = None
+
+    @property
+    def esphome_version(self):
+        # consultar a versão instalada custa caro; só quando alguma validação for usada
+        return esphome_version()
+
+    def init_app(self, app):
+        self.app = app
+
+    def get_cached(self, config_hash):
+        result = self.validation_repository.get_result(config_hash, self.esphome_version)
+        return self.serialize_result(result) if result else None
+
+    def get_cached_many(self, config_hashes):
+        results = self.validation_repository.get_results(config_hashes, self.esphome_version)
+        return {result.config_hash: self.serialize_result(result) for result in results}
+
+    def submit(self, config_hash, config_file):
+        with self._lock:
+            future = self._pending.get(config_hash)
+            if future is not None:
+                return future
+            future = Future()
+            self._pending[config_hash] = future
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._worker_loop, name="config-validator", daemon=True
+                )
+                self._thread.start()
+        self._queue.put((config_hash, config_file, future))
+        return future
+
+    def serialize_result(self, result):
+        return {
+            "config_hash": result.config_hash,
+            "esphome_version": result.esphome_version,
+            "valid": result.valid,
+            "output": result.output,
+            "validated_at": result.validated_at.isoformat(),
+        }
+
+    def close(self):
+        if self._process is not None and self._process.poll() is None:
+            self._process.stdin.close()
+            self._process.wait(timeout=5)
+
+    def _worker_loop(self):
+        while True:
+            config_hash, config_file, future = self._queue.get()
+            try:
+                with self.app.app_context():
+                    future.set_result(self._validate(config_hash, config_file))
+            except Exception as error:
+                future.set_exception(error)
+            finally:
+                with self._lock:
+                    self._pending.pop(config_hash, None)
+
+    def _validate(self, config_hash, config_file):
+        cached = self.get_cached(config_hash)
+        if cached is not None:
+            return cached
+        with open(config_file) as yaml_file:
+            current_hash = hash_config(yaml_file.read())
+        if current_hash != config_hash:
+            # o arquivo mudou depois do pedido; a nova versão será validada em outro pedido
+            return None
+        response = self._send({"config_file": config_file})
+        if response is None:
+            return {
+                "config_hash": config_hash,
+                "esphome_version": self.esphome_version,
+                "valid": False,
+                "output": "Validador do ESPHome indisponível.",
+                "validated_at": None,
+            }
+        result = self.validation_repository.create({
+            "config_hash": config_hash,
+            "esphome_version": self.esphome_version,
+            "valid": response["valid"],
+            "output": response["output"],
+            "validated_at": datetime.now(),
+        })
+        return self.serialize_result(result)
+
+    def _send(self, request, retries=1):
+        for _ in range(retries + 1):
+            if self._process is None or self._process.poll() is not None:
+                self._process = subprocess.Popen(
+                    [sys.executable, "-m", "src.validation_worker"],
+                    stdin=subprocess.PIPE,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.DEVNULL,
+                    text=True,
+                )
+            try:
+                self._process.stdin.write(json.dumps(request) + "\n")
+                self._process.stdin.flush()
+                line = self._process.stdout.readline()
+            except BrokenPipeError:
+                line = ""
+            if line:
+                return json.loads(line)
+            self._process.kill()
+            self._process.wait()
+        return None
@@ -1,31 +1,130 @@
+import hashlib
+import os
+import re
+import tempfile
+from functools import cache
+from importlib.metadata import PackageNotFoundError, version
 from secrets import choice
-import serial.tools.list_ports
-import yaml
 
 
 def generate_password(length = 12):
     alpha_num = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789"
     return "".join([choice(alpha_num) for _ in range(length)])
 
-class LambdaStr(str):
-    pass
+def represent_config_str(dumper, data):
+    if data.startswith('!lambda '):
+        # o emissor em Python nunca usa estilo plain com tag explícita; a libyaml usaria
+        return dumper.represent_scalar('!lambda', data[len('!lambda '):], style="'")
+    return dumper.represent_str(data)
 
-def lambda_representer(dumper, data):
-    return dumper.represent_scalar('!lambda', data)
+ASTRAL_CHARACTERS = re.compile("[\U00010000-\U0010FFFF]")
 
-yaml.add_representer(LambdaStr, lambda_representer)
-
-def convert_tags(obj):
+def has_astral_characters(obj):
+    if isinstance(obj, str):
+        return ASTRAL_CHARACTERS.search(obj) is not None
     if isinstance(obj, dict):
-        return {k: convert_tags(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [convert_tags(i) for i in obj]
-    elif isinstance(obj, str) and obj.startswith('!lambda '):
-        return LambdaStr(obj[len('!lambda '):])
-    return obj
+        return any(has_astral_characters(key) or has_astral_characters(value) for key, value in obj.items())
+    if isinstance(obj, list):
+        return any(has_astral_characters(item) for item in obj)
+    return False
+
+@cache
+def config_dumper(pure=False):
+    # o yaml só é importado quando algum arquivo de configuração é gerado
+    import yaml
+    if pure:
+        from yaml import Dumper as BaseDumper
+    else:
+        try:
+            from yaml import CDumper as BaseDumper
+        except ImportError:
+            from yaml import Dumper as BaseDumper
+
+    class ConfigDumper(BaseDumper):
+        # a configuração vem do banco: nada de âncoras/aliases no YAML gerado
+        def ignore_aliases(self, data):
+            return True
+
+    ConfigDumper.add_representer(str, represent_config_str)
+    return ConfigDumper
 
 def dict_to_yaml(obj):
-    return yaml.dump(convert_tags(obj), sort_keys=False, allow_unicode=True)
+    import yaml
+    content = yaml.dump(obj, Dumper=config_dumper(), sort_keys=False, allow_unicode=True)
+    if "\\U" in content and has_astral_characters(obj):
+        # a libyaml escreve caracteres fora do BMP (ex.: emojis) como "\U0001F600" entre aspas;
+        # o emissor em Python os mantém como estão, que é o que os arquivos sempre tiveram
+        content = yaml.dump(obj, Dumper=config_dumper(pure=True), sort_keys=False, allow_unicode=True)
+    return content
+
+@cache
+def esphome_version():
+    try:
+        return version("esphome")
+    except PackageNotFoundError:
+        return "unknown"
+
+def hash_config(content):
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+def hash_config_file(path):
+    # None quando o arquivo não existe ou não pode ser lido
+    try:
+        with open(path, encoding="utf-8") as config_file:
+            return hash_config(config_file.read())
+    except OSError:
+        return None
+
+def write_file_atomic(path, content):
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".", suffix=".tmp")
+    try:
+        os.chmod(tmp_path, 0o644)
+        with os.fdopen(fd, "w") as tmp_file:
+            tmp_file.write(content)
+            tmp_file.flush()
+            os.fsync(tmp_file.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def parse_page_args(args, allowed_fields, max_limit=500, optional_fields=()):
+    limit = min(max(args.get("limit", 50, type=int), 1), max_limit)
+    after_id = args.get("after", type=int)
+    fields = allowed_fields
+    if args.get("fields"):
+        # campos opcionais são caros de calcular: só entram quando pedidos em fields
+        fields = tuple(
+            field for field in args.get("fields").split(",") if field in allowed_fields + optional_fields
+        )
+        if "id" not in fields:
+            fields = ("id",) + fields
+    return limit, after_id, fields
+
+def is_id(value):
+    # bool é subclasse de int: True não pode virar o registro #1
+    return isinstance(value, int) and not isinstance(value, bool)
+
+def is_id_list(value):
+    return isinstance(value, list) and len(value) > 0 and all(is_id(item) for item in value)
+
+DEVICE_NAME = re.compile(r"[a-z0-9]+(-[a-z0-9]+)*")
+
+def is_device_name(value):
+    # o nome vira o nome do arquivo .yaml: nada de barras, pontos ou maiúsculas
+    return isinstance(value, str) and DEVICE_NAME.fullmatch(value) is not None
 
 def list_serial_ports():
-    return [port.device for port in serial.tools.list_ports.comports()]
+    import serial.tools.list_ports
+    return [
+        {
+            "port": port.device,
+            "description": port.description,
+            "vid": port.vid,
+            "pid": port.pid,
+            "serial_number": port.serial_number,
+        }
+        for port in serial.tools.list_ports.comports()
+    ]
@@ -0,0 +1,44 @@
+import contextlib
+import io
+import json
+import logging
+import os
+import re
+import sys
+from esphome.config import read_config
+from esphome.core import CORE
+
+
+ANSI_ESCAPE = re.compile(r"\x1b\[[0-9;]*m")
+
+
+def validate(config_file):
+    output = io.StringIO()
+    handler = logging.StreamHandler(output)
+    logging.getLogger().addHandler(handler)
+    try:
+        with contextlib.redirect_stdout(output):
+            CORE.config_path = config_file
+            config = read_config({})
+    except Exception as error:
+        output.write(f"{error}\n")
+        config = None
+    finally:
+        logging.getLogger().removeHandler(handler)
+        CORE.reset()
+    return {"valid": config is not None, "output": ANSI_ESCAPE.sub("", output.getvalue())}
+
+
+def main():
+    # o stdout original fica reservado para o protocolo (uma linha JSON por resposta)
+    protocol = os.fdopen(os.dup(sys.stdout.fileno()), "w")
+    sys.stdout = sys.stderr
+    logging.basicConfig(level=logging.INFO)
+    for line in sys.stdin:
+        request = json.loads(line)
+        protocol.write(json.dumps(validate(request["config_file"])) + "\n")
+        protocol.flush()
+
+
+if __name__ == "__main__":
+    main()